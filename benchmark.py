@@ -0,0 +1,488 @@
+"""Benchmarks for the ingestion / RAG pipeline.
+
+    python benchmark.py extract [--workers N] [--repeat R] [pdf_or_folder ...]
+    python benchmark.py stream [--pages N ...] [--ranking tfidf heavy_hitters]
+    python benchmark.py clean [--pages N]
+    python benchmark.py heavy [--items N] [--capacity M ...] [--bad-terms T ...]
+    python benchmark.py embed [--batch-size B ...] [--threads T ...] [pdf_or_folder ...]
+    python benchmark.py vectors [--sizes N ...] [--queries Q] [--simple-max N] [--faiss flat ivf hnsw]
+    python benchmark.py quantize [--size N] [--npy vectors.npy] [--rescore R ...]
+    python benchmark.py llm [--sections N] [--concurrency C ...] [--base-url URL] [--fail-rate F]
+"""
+import argparse
+import random
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_PATH = Path(__file__).resolve().parent
+
+
+def collect_pdfs(targets):
+    """PDF files from the given files/folders (default: docs/data + docs/sections)"""
+    targets = targets or [BASE_PATH / "docs" / "data", BASE_PATH / "docs" / "sections"]
+    pdf_paths = []
+    for target in map(Path, targets):
+        pdf_paths += sorted(target.glob("*.pdf")) if target.is_dir() else [target]
+    return [str(p) for p in pdf_paths]
+
+
+def report(label, count, unit, seconds):
+    rate = count / seconds if seconds else float("inf")
+    print(f"  {label:<28} {count:>8} {unit:<7} {seconds:8.3f}s  {rate:10.1f} {unit}/s")
+
+
+def synthetic_pages(n_pages, words_per_page=450, seed=0):
+    """Deterministic pharmacovigilance-flavoured page text"""
+    rng = random.Random(seed)
+    vocab = ("pharmacovigilance signal detection adverse event reporting benzodiazepine "
+             "insomnia ontology learning physician notes daytime impairment risk "
+             "management plan regulatory assessment cohort exposure outcome the of and "
+             "with for in to MedDRA EudraVigilance Trazodone Pharmacokinetics").split()
+    for _ in range(n_pages):
+        yield " ".join(rng.choice(vocab) for _ in range(words_per_page))
+
+
+def legacy_clean_text(text):
+    """PaperGenerator.clean_text as it was before normalizer.normalize_text"""
+    if not text: return ""
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    text = re.sub(r"[^A-Za-z0-9 .,;:()-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def bench_clean(args):
+    from normalizer import normalize_text
+
+    # Parity with legacy_clean_text: tests/test_normalizer.py
+    # Throughput on pages with camelCase joins, unicode and layout whitespace
+    noisy = [page.replace(" the ", " theNext\u00a0").replace(" risk ", "\trisk—\n")
+             for page in synthetic_pages(args.pages)]
+    n_chars = sum(map(len, noisy))
+    print(f"🧹 {args.pages} pages, {n_chars / 2**20:.1f} MiB of text")
+    for label, clean in (("legacy 4-pass regex", legacy_clean_text), ("single-pass normalizer", normalize_text)):
+        start = time.perf_counter()
+        for page in noisy:
+            clean(page)
+        report(label, args.pages, "pages", time.perf_counter() - start)
+
+
+def measure(func):
+    """(result, seconds, peak traced MiB) of ``func()``"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def synthetic_corpus(folder, cache_dir, n_pages, pages_per_doc):
+    """Placeholder PDF files whose pages are already in the page cache at
+    ``cache_dir``, so ingesting them reads pages exactly like real PDFs"""
+    from cache_utils import file_sha256
+    from pdf_cache import PdfPageCache
+
+    folder.mkdir(parents=True, exist_ok=True)
+    page_cache = PdfPageCache(cache_dir, keep_in_memory=False)
+    pdf_paths = []
+    for i, start in enumerate(range(0, n_pages, pages_per_doc)):
+        pdf_path = folder / f"doc{i:05d}.pdf"
+        pdf_path.write_text(f"synthetic {n_pages}/{i}")
+        pages = list(synthetic_pages(min(pages_per_doc, n_pages - start), seed=i))
+        page_cache._store(file_sha256(pdf_path), pdf_path, pages)  # as if extracted
+        pdf_paths.append(str(pdf_path))
+    return pdf_paths
+
+
+def bench_stream(args):
+    import tempfile
+    from corpus import DocumentStore
+    from normalizer import normalize_text
+    from pdf_cache import PdfPageCache
+    from terms import PhraseFilter, SpaceSaving, TermIndex, iter_candidates
+
+    def rank_terms(pdf_paths, cache_dir, terms_path, ranking, stream_corpus):
+        """Ingest + rank the whole corpus as extract_terms does for ``term_ranking``"""
+        store = DocumentStore(PdfPageCache(cache_dir, keep_in_memory=not stream_corpus),
+                              normalize_text, keep_pages=not stream_corpus)
+        docs = store.ingest(pdf_paths, "data")
+        phrase_filter = PhraseFilter(args.bad_terms)
+        if ranking == "tfidf":
+            terms_path.unlink(missing_ok=True)
+            term_index = TermIndex(terms_path, phrase_filter)
+            term_index.sync(docs)
+            return term_index.top_terms(3)
+        sketch = SpaceSaving.from_memory_mb(args.memory_mb)
+        return sketch.update(iter_candidates(store.iter_clean_pages(docs), phrase_filter, memo=False)).top_terms(3)
+
+    print(f"🔑 Term ranking over the full corpus: materialized vs stream_corpus (bad_terms={args.bad_terms})")
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        for n_pages in args.pages:
+            cache_dir = workdir / f"pages-{n_pages}"
+            pdf_paths = synthetic_corpus(workdir / f"corpus-{n_pages}", cache_dir, n_pages, args.pages_per_doc)
+            for ranking in args.ranking:
+                runs = [measure(lambda: rank_terms(pdf_paths, cache_dir, workdir / "terms.json", ranking, stream))
+                        for stream in (False, True)]
+                (old_terms, old_time, old_peak), (new_terms, new_time, new_peak) = runs
+                print(f"  {n_pages:>7} pages {ranking:<13}  materialized {old_peak:8.1f} MiB {old_time:7.2f}s"
+                      f"  | stream_corpus {new_peak:7.1f} MiB {new_time:7.2f}s  same terms: {old_terms == new_terms}")
+
+
+def bench_heavy(args):
+    from collections import Counter
+    from terms import PhraseFilter, SpaceSaving, iter_candidates
+
+    syllables = "ba ce di fo gu ha ke li mo nu pa se ti vo zu la".split()
+
+    def spell(n):
+        """Letters-only word for ``n`` (TERM_PATTERNS ignore digits)"""
+        word = ""
+        while n or len(word) < 6:
+            word += syllables[n % 16]
+            n //= 16
+        return word
+
+    def pages():
+        """Zipf-like candidate phrases, a few dominant over a very long tail,
+        50 per page and generated lazily, so only the counters use memory"""
+        rng = random.Random(0)
+        for _ in range(args.items // 50):
+            yield ". ".join(f"Candidate {spell(int(rng.paretovariate(args.alpha) * 10))}"
+                            for _ in range(50))
+
+    def candidates(memo=False):
+        # The same path as term_ranking: heavy_hitters in paper_generator
+        return iter_candidates(pages(), PhraseFilter(args.bad_terms), memo=memo)
+
+    exact, exact_time, exact_peak = measure(lambda: Counter(candidates()))
+    true_top = [term for term, _ in exact.most_common(args.top)]
+    print(f"📈 {sum(exact.values())} candidates, {len(exact)} distinct, "
+          f"exact Counter {exact_peak:.1f} MiB {exact_time:.2f}s")
+
+    for capacity in args.capacity:
+        sketch, seconds, peak = measure(lambda: SpaceSaving(capacity).update(candidates()))
+        top = sketch.top(args.top)
+        abs_errors = [abs(count - exact[term]) for term, count, _ in top]
+        within = all(count - error <= exact[term] <= count for term, count, error in top)
+        recall = len({term for term, _, _ in top} & set(true_top)) / len(true_top)
+        print(f"  capacity {capacity:>7}: {peak:6.2f} MiB {seconds:6.2f}s  top-{args.top} recall {recall:.2f}"
+              f"  max|err| {max(abs_errors)} mean|err| {sum(abs_errors) / len(abs_errors):.1f}"
+              f"  bound N/m {sketch.error_bound:.0f}  within bounds: {within}")
+    _, seconds, peak = measure(lambda: SpaceSaving(args.capacity[0]).update(candidates(memo=True)))
+    print(f"  capacity {args.capacity[0]:>7} + verdict memo: {peak:6.2f} MiB {seconds:6.2f}s")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def embed_chunks(args):
+    """Chunk texts from PDFs (when given) or variable-length synthetic pages"""
+    if args.paths:
+        from llama_index.core import Document
+        from llama_index.core.node_parser import SentenceSplitter
+        from pdf_cache import ParallelExtractor
+
+        pages = ParallelExtractor().extract_many(collect_pdfs(args.paths))
+        documents = [Document(text=text) for doc_pages in pages.values() for text in doc_pages]
+        nodes = SentenceSplitter(chunk_size=args.chunk_size, chunk_overlap=50).get_nodes_from_documents(documents)
+        return [node.get_content() for node in nodes][:args.chunks]
+    rng = random.Random(1)
+    words = " ".join(synthetic_pages(1, words_per_page=args.chunk_size)).split()
+    return [" ".join(words[:rng.randint(8, args.chunk_size)]) for _ in range(args.chunks)]
+
+
+def bench_embed(args):
+    from embeddings import get_embed_model, set_torch_threads, token_lengths
+
+    texts = embed_chunks(args)
+    embed_model = get_embed_model(args.model, device="cpu")
+    lengths = token_lengths(texts, embed_model)
+    print(f"🧠 {args.model} on CPU, {len(texts)} chunks, "
+          f"{min(lengths)}-{max(lengths)} tokens (mean {sum(lengths) / len(lengths):.0f})")
+    embed_model.get_text_embedding_batch(texts[:args.batch_size[0]])  # warm-up
+
+    bucketed = [texts[i] for i in sorted(range(len(texts)), key=lengths.__getitem__)]
+    for threads in args.threads:
+        set_torch_threads(threads)
+        for batch_size in args.batch_size:
+            for label, ordered in (("input order", texts), ("length-bucketed", bucketed)):
+                latencies = []
+                start = time.perf_counter()
+                for i in range(0, len(ordered), batch_size):
+                    batch_start = time.perf_counter()
+                    embed_model.get_text_embedding_batch(ordered[i:i + batch_size])
+                    latencies.append((time.perf_counter() - batch_start) * 1000)
+                seconds = time.perf_counter() - start
+                print(f"  threads {threads:>2} batch {batch_size:>4} {label:<16} "
+                      f"{len(texts) / seconds:8.1f} chunks/s  batch latency ms "
+                      f"p50 {percentile(latencies, 50):7.1f} p95 {percentile(latencies, 95):7.1f} "
+                      f"p99 {percentile(latencies, 99):7.1f}")
+
+
+def bench_vectors(args):
+    import numpy as np
+    from llama_index.core.vector_stores import SimpleVectorStore, VectorStoreQuery
+    from llama_index.core.vector_stores.simple import SimpleVectorStoreData
+    from vector_stores import FaissVectorStore, NumpyVectorStore
+
+    def blocks(size, block=100_000):
+        """The same random vectors on every call, a block at a time"""
+        rng = np.random.default_rng(size)
+        for start in range(0, size, block):
+            count = min(block, size - start)
+            yield [f"node-{i}" for i in range(start, start + count)], \
+                rng.standard_normal((count, args.dim), dtype=np.float32)
+
+    queries = np.random.default_rng(0).standard_normal((args.queries, args.dim), dtype=np.float32)
+    for size in args.sizes:
+        print(f"📐 {size} x {args.dim} vectors, {args.queries} queries, top-{args.top_k}")
+        store = NumpyVectorStore()
+        for ids, vectors in blocks(size):
+            store.add_embeddings(ids, vectors)
+        start = time.perf_counter()
+        single = [store.query(VectorStoreQuery(query_embedding=q.tolist(), similarity_top_k=args.top_k))
+                  for q in queries]
+        single_time = time.perf_counter() - start
+        report("numpy (one query at a time)", args.queries, "queries", single_time)
+        start = time.perf_counter()
+        batched = store.query_batch(queries, args.top_k)
+        report("numpy (batched)", args.queries, "queries", time.perf_counter() - start)
+        same = all(a.ids == b.ids for a, b in zip(single, batched))
+        print(f"  matrix {store.nbytes / 2**20:.0f} MiB, batched == single: {same}")
+        del store
+
+        for index_type in args.faiss:
+            faiss_store = FaissVectorStore(index_type=index_type)
+            for ids, vectors in blocks(size):
+                faiss_store.add_embeddings(ids, vectors)
+            start = time.perf_counter()
+            faiss_store.query_batch(queries[:1], args.top_k)  # builds (IVF: trains) the index
+            build_time = time.perf_counter() - start
+            start = time.perf_counter()
+            approx = [faiss_store.query(VectorStoreQuery(query_embedding=q.tolist(), similarity_top_k=args.top_k))
+                      for q in queries]
+            report(f"faiss {index_type} (build {build_time:.1f}s)", args.queries, "queries",
+                   time.perf_counter() - start)
+            recall = sum(len(set(a.ids) & set(b.ids)) for a, b in zip(approx, single)) / (args.top_k * args.queries)
+            print(f"  faiss {index_type} recall@{args.top_k} vs exact: {recall:.3f}")
+            del faiss_store
+
+        if size > args.simple_max:
+            print(f"  SimpleVectorStore skipped above --simple-max {args.simple_max}")
+            continue
+        data = SimpleVectorStoreData()
+        for ids, vectors in blocks(size):
+            data.embedding_dict.update(zip(ids, vectors.tolist()))
+            data.text_id_to_ref_doc_id.update(dict.fromkeys(ids, "None"))
+        simple = SimpleVectorStore(data=data)
+        n_simple = min(args.queries, args.simple_queries)
+        start = time.perf_counter()
+        baseline = [simple.query(VectorStoreQuery(query_embedding=q.tolist(), similarity_top_k=args.top_k))
+                    for q in queries[:n_simple]]
+        simple_time = time.perf_counter() - start
+        report("SimpleVectorStore", n_simple, "queries", simple_time)
+        del simple, data
+        agree = sum(a.ids == b.ids for a, b in zip(baseline, single)) / n_simple
+        speedup = (simple_time / n_simple) / (single_time / args.queries)
+        print(f"  speedup x{speedup:.0f} per query, same top-k as SimpleVectorStore: {agree:.0%}")
+
+
+def bench_quantize(args):
+    import numpy as np
+    from vector_stores import NumpyVectorStore
+
+    rng = np.random.default_rng(0)
+    if args.npy:
+        # Real embeddings, e.g. .rag_cache/index/default__vector_store.npy
+        vectors = np.load(args.npy)
+        rng.shuffle(vectors)
+        queries, vectors = vectors[:args.queries], vectors[args.queries:args.queries + args.size]
+    else:
+        # Clustered vectors: closer to sentence embeddings than plain noise
+        centers = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+        def sample(n):
+            return centers[rng.integers(0, args.clusters, n)] + 0.6 * rng.standard_normal((n, args.dim), dtype=np.float32)
+        vectors, queries = sample(args.size), sample(args.queries)
+    ids = [f"node-{i}" for i in range(len(vectors))]
+    print(f"🗜️  {len(vectors)} x {vectors.shape[1]} vectors, {len(queries)} held-out queries, recall@{args.top_k}")
+
+    exact = NumpyVectorStore()
+    exact.add_embeddings(ids, vectors)
+    truth = [set(result.ids) for result in exact.query_batch(queries, args.top_k)]
+    baseline = exact.nbytes
+    print(f"  {'float32 (exact)':<16} {baseline / 2**20:8.1f} MiB resident")
+    del exact
+
+    for quantization in args.modes:
+        store = NumpyVectorStore(quantization=quantization, pq_m=args.pq_m)
+        store.add_embeddings(ids, vectors)
+        store.query_batch(queries[:1], args.top_k)  # builds the codes
+        # float32 rows are memory-mapped from disk once persisted, so only codes stay resident
+        resident = store.nbytes - len(vectors) * vectors.shape[1] * 4
+        for rescore in args.rescore:
+            store.rescore = rescore
+            start = time.perf_counter()
+            results = store.query_batch(queries, args.top_k)
+            seconds = time.perf_counter() - start
+            recall = sum(len(set(r.ids) & t) for r, t in zip(results, truth)) / (args.top_k * len(queries))
+            print(f"  {quantization:<8} rescore x{rescore:<3} {resident / 2**20:8.1f} MiB resident "
+                  f"({1 - resident / baseline:5.1%} saved)  recall@{args.top_k} {recall:.3f}  "
+                  f"{seconds / len(queries) * 1000:7.2f} ms/query")
+        del store
+
+
+def bench_extract(args):
+    import pdfplumber
+    from pdf_cache import ParallelExtractor
+
+    pdf_paths = collect_pdfs(args.paths) * args.repeat
+    print(f"📑 {len(pdf_paths)} PDFs (repeat={args.repeat})")
+
+    # Serial baseline: the pre-engine loaders, one file and one page at a time
+    start = time.perf_counter()
+    serial = {}
+    for pdf_path in pdf_paths:
+        text = ""
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                text += (page.extract_text() or "") + "\n"
+        serial[pdf_path] = text
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = ParallelExtractor(args.workers, args.pages_per_task).extract_many(pdf_paths)
+    parallel_time = time.perf_counter() - start
+
+    n_pages = sum(len(parallel[path]) for path in pdf_paths)
+    same = all("".join(p + "\n" for p in parallel[path]) == serial[path] for path in pdf_paths)
+    report("serial (text +=)", n_pages, "pages", serial_time)
+    report(f"process pool ({args.workers or 'all'} workers)", n_pages, "pages", parallel_time)
+    print(f"  speedup x{serial_time / parallel_time:.2f}, identical output: {same}")
+
+
+def bench_llm(args):
+    from llm_client import llm_stats
+    from ollama_stub import start_stub_server
+    from paper_generator import PaperGenerator
+
+    server = None
+    if not args.base_url:
+        server = start_stub_server(ttft=args.ttft, token_latency=args.token_latency, tokens=args.tokens,
+                                   parallel=args.parallel, fail_rate=args.fail_rate)
+        args.base_url = server.url
+        print(f"🧪 Ollama stub on {server.url}: ttft {args.ttft}s, {args.token_latency}s/token, "
+              f"{args.tokens} tokens, {args.parallel} parallel, fail rate {args.fail_rate}")
+
+    generator = PaperGenerator(str(BASE_PATH / "config.yaml"))
+    generator.config.update(ollama_base_url=args.base_url, llm_retry_backoff=0.0)
+    llm = generator.get_llm()
+    try:
+        for concurrency in args.concurrency:
+            generator.config.update(llm_concurrency=concurrency, llm_cache=False)
+            prompts = {f"S{i}-c{concurrency}": f"Rewrite section {i} (run {concurrency})"
+                       for i in range(args.sections)}
+            start = time.perf_counter()
+            enhanced = generator.enhance_sections(llm, prompts)
+            seconds = time.perf_counter() - start
+            failed = sum(text is None for text in enhanced.values())
+            stats = llm_stats()
+            print(f"  concurrency {concurrency:>2}  {args.sections} sections {seconds:7.2f}s  "
+                  f"{args.sections / seconds:6.2f} sections/s  TTFT p50 {stats['ttft_s_p50']}s  "
+                  f"{stats['tokens_per_s_p50']} tok/s p50  failed {failed}")
+    finally:
+        if server is not None:
+            print(f"  stub: {server.settings.requests} requests, {server.settings.failures} injected failures")
+            server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("extract", help="PDF pages/sec: serial vs process pool")
+    extract.add_argument("paths", nargs="*")
+    extract.add_argument("--workers", type=int, default=0, help="0 = all cores")
+    extract.add_argument("--pages-per-task", type=int, default=8)
+    extract.add_argument("--repeat", type=int, default=1, help="replicate the file list")
+    extract.set_defaults(func=bench_extract)
+
+    stream = commands.add_parser("stream", help="term ranking peak memory: materialized vs stream_corpus")
+    stream.add_argument("--pages", type=int, nargs="+", default=[1000, 5000, 20000])
+    stream.add_argument("--pages-per-doc", type=int, default=50)
+    stream.add_argument("--ranking", nargs="+", choices=["tfidf", "heavy_hitters"],
+                        default=["tfidf", "heavy_hitters"], help="term_ranking modes to run")
+    stream.add_argument("--memory-mb", type=int, default=64, help="heavy_hitters_memory_mb")
+    stream.add_argument("--bad-terms", nargs="*", default=["pharmacovigilance", "learning", "notes"],
+                        help="bad_terms of the phrase filter")
+    stream.set_defaults(func=bench_stream)
+
+    clean = commands.add_parser("clean", help="clean_text speed: legacy 4-pass regex vs single pass")
+    clean.add_argument("--pages", type=int, default=20000)
+    clean.set_defaults(func=bench_clean)
+
+    heavy = commands.add_parser("heavy", help="Space-Saving heavy hitters vs exact counts")
+    heavy.add_argument("--items", type=int, default=1_000_000)
+    heavy.add_argument("--alpha", type=float, default=0.3, help="Pareto tail exponent (lower = longer tail)")
+    heavy.add_argument("--top", type=int, default=20)
+    heavy.add_argument("--capacity", type=int, nargs="+", default=[500, 5000, 50000])
+    heavy.add_argument("--bad-terms", nargs="*", default=[])
+    heavy.set_defaults(func=bench_heavy)
+
+    embed = commands.add_parser("embed", help="embedding chunks/sec + batch latency by batch size / threads")
+    embed.add_argument("paths", nargs="*", help="PDFs to chunk (default: synthetic chunks)")
+    embed.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    embed.add_argument("--chunks", type=int, default=2000)
+    embed.add_argument("--chunk-size", type=int, default=400, help="max words (synthetic) / tokens (PDF) per chunk")
+    embed.add_argument("--batch-size", type=int, nargs="+", default=[16, 64, 128])
+    embed.add_argument("--threads", type=int, nargs="+", default=[1, 4], help="torch intra-op threads")
+    embed.set_defaults(func=bench_embed)
+
+    vectors = commands.add_parser("vectors", help="top-k query throughput: numpy store vs SimpleVectorStore")
+    vectors.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    vectors.add_argument("--dim", type=int, default=384, help="MiniLM-L6 = 384")
+    vectors.add_argument("--queries", type=int, default=200)
+    vectors.add_argument("--top-k", type=int, default=5)
+    vectors.add_argument("--simple-max", type=int, default=100_000,
+                         help="largest size the (slow, list-based) SimpleVectorStore is run at")
+    vectors.add_argument("--simple-queries", type=int, default=20, help="queries timed on SimpleVectorStore")
+    vectors.add_argument("--faiss", nargs="*", default=[], choices=["flat", "ivf", "hnsw"],
+                         help="also time these FAISS index types (recall vs the exact numpy store)")
+    vectors.set_defaults(func=bench_vectors)
+
+    quantize = commands.add_parser("quantize", help="float16/int8/PQ codes: memory saved vs recall@k")
+    quantize.add_argument("--npy", help="real embedding matrix to sample from (default: synthetic clusters)")
+    quantize.add_argument("--size", type=int, default=100_000)
+    quantize.add_argument("--dim", type=int, default=384)
+    quantize.add_argument("--clusters", type=int, default=500)
+    quantize.add_argument("--queries", type=int, default=200, help="held-out queries (not in the store)")
+    quantize.add_argument("--top-k", type=int, default=10)
+    quantize.add_argument("--modes", nargs="+", default=["float16", "int8", "pq"])
+    quantize.add_argument("--rescore", type=int, nargs="+", default=[1, 4, 10],
+                          help="shortlist = rescore * top_k, rescored in float32 (1 = codes only)")
+    quantize.add_argument("--pq-m", type=int, default=48, help="PQ sub-vectors (must divide dim)")
+    quantize.set_defaults(func=bench_quantize)
+
+    llm = commands.add_parser("llm", help="section enhancement wall time by llm_concurrency (stub or live Ollama)")
+    llm.add_argument("--sections", type=int, default=8)
+    llm.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    llm.add_argument("--base-url", help="live Ollama server (default: in-process stub)")
+    llm.add_argument("--ttft", type=float, default=0.2, help="stub: seconds before the first token")
+    llm.add_argument("--token-latency", type=float, default=0.01, help="stub: seconds per token")
+    llm.add_argument("--tokens", type=int, default=100, help="stub: tokens per answer")
+    llm.add_argument("--parallel", type=int, default=4, help="stub: requests generated at once")
+    llm.add_argument("--fail-rate", type=float, default=0.0, help="stub: fraction of requests failing")
+    llm.set_defaults(func=bench_llm)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
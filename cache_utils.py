@@ -0,0 +1,110 @@
+"""Small helpers shared by the caches (hashing, JSON manifests, LRU, hit rates)"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+# (path, size, mtime_ns) -> sha256, so one process hashes each file once
+_hash_memo = {}
+
+
+def file_sha256(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks so large PDFs never sit in memory"""
+    stat = os.stat(path)
+    memo_key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _hash_memo:
+        return _hash_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def content_version(signature):
+    """Short stable hash of a JSON-able signature (e.g. index settings + file hashes)"""
+    return hashlib.sha256(json.dumps(signature, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def read_json(path, default=None):
+    """Return parsed JSON or ``default`` if the file is missing/corrupt"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path, data):
+    """Write JSON via a temp file + rename so readers never see half a file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class HitStats:
+    """``hits`` / ``misses`` counters and the ``stats()`` every cache reports"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+class LRUCache(HitStats):
+    """Thread-safe in-memory LRU map capped at ``max_entries`` (0 = store nothing)"""
+
+    def __init__(self, max_entries):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_if(self, predicate):
+        """Drop every entry whose key satisfies ``predicate(key)``"""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"entries": len(self._entries), **super().stats()}
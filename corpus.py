@@ -0,0 +1,165 @@
+"""Shared document store for docs/sections and docs/data.
+
+Each PDF is ingested once per process (per content hash): raw pages come
+from the page cache, are cleaned once, and the resulting ``CorpusDocument``
+feeds both term extraction and RAG index construction.
+
+Everything downstream consumes pages through generators (``iter_pages``,
+``iter_clean_pages``, ``iter_llama_documents``). With ``keep_pages=False``
+the store keeps only metadata and streams pages from the page cache on
+demand, so peak memory stays flat however large the corpus gets.
+"""
+import threading
+from pathlib import Path
+
+from llama_index.core import Document
+
+from cache_utils import file_sha256
+
+
+class CorpusDocument:
+    def __init__(self, path, sha256, kind, page_source, clean_text, keep_pages=True):
+        self.path = str(path)
+        self.name = Path(path).name
+        self.sha256 = sha256
+        self.kind = kind  # "section" | "data"
+        self._page_source = page_source  # () -> iterator of raw page text
+        self._clean = clean_text
+        self.pages = self.clean_pages = None
+        if keep_pages:
+            self.pages = list(page_source())  # raw pdfplumber text
+            self.clean_pages = [clean_text(page) for page in self.pages]
+
+    @property
+    def metadata(self):
+        return {"file_name": self.name, "kind": self.kind, "sha256": self.sha256}
+
+    def iter_pages(self):
+        return iter(self.pages) if self.pages is not None else self._page_source()
+
+    def iter_clean_pages(self, max_pages=None):
+        if self.clean_pages is not None:
+            yield from self.clean_pages[:max_pages]
+            return
+        for page_num, page in enumerate(self.iter_pages()):
+            if max_pages is not None and page_num >= max_pages:
+                return
+            yield self._clean(page)
+
+    def clean_text(self, max_pages=None):
+        return "".join(page + "\n" for page in self.iter_clean_pages(max_pages))
+
+    def iter_llama_documents(self):
+        """One llama_index Document per non-empty page"""
+        for page_num, text in enumerate(self.iter_pages(), 1):
+            if text.strip():
+                yield Document(
+                    id_=f"{self.name}:{self.sha256[:16]}:p{page_num}",
+                    text=text,
+                    metadata={**self.metadata, "page_label": str(page_num)},
+                    # Embed the page text alone: the embedding (and its cache
+                    # key) then survives renames and page shifts. kind/sha256
+                    # are bookkeeping only: keep them out of prompts too
+                    excluded_embed_metadata_keys=["file_name", "kind", "sha256", "page_label"],
+                    excluded_llm_metadata_keys=["kind", "sha256"],
+                )
+
+
+class DocumentStore:
+    def __init__(self, page_cache, clean_text, keep_pages=True):
+        self.page_cache = page_cache
+        self.clean_text = clean_text
+        self.keep_pages = keep_pages
+        self._docs = {}  # path -> CorpusDocument
+
+    def ingest(self, pdf_paths, kind):
+        """Parse+clean every new/changed file once; returns docs in input order"""
+        hashes = {}
+        for pdf_path in map(str, pdf_paths):
+            try:
+                hashes[pdf_path] = file_sha256(pdf_path)
+            except FileNotFoundError:
+                # Deleted/renamed since the folder was listed (e.g. by the watcher)
+                print(f"⚠️ Skipping {Path(pdf_path).name}: file no longer exists")
+                self._docs.pop(pdf_path, None)
+        pdf_paths = list(hashes)
+        stale = [p for p in pdf_paths if p not in self._docs or self._docs[p].sha256 != hashes[p]]
+        if stale:
+            self.page_cache.prefetch(stale)
+        for pdf_path in stale:
+            if not self.keep_pages and not self.page_cache.contains(pdf_path):
+                print(f"⚠️ Cannot ingest {Path(pdf_path).name}: extraction failed")
+                self._docs.pop(pdf_path, None)
+                continue
+            try:
+                self._docs[pdf_path] = CorpusDocument(
+                    pdf_path, hashes[pdf_path], kind,
+                    lambda path=pdf_path: self.page_cache.iter_pages(path),
+                    self.clean_text, keep_pages=self.keep_pages,
+                )
+            except Exception as e:
+                print(f"⚠️ Cannot ingest {Path(pdf_path).name}: {e}")
+                self._docs.pop(pdf_path, None)
+        return [self._docs[p] for p in pdf_paths if p in self._docs]
+
+    def sync(self, pdf_paths, kind):
+        """``ingest`` plus dropping ``kind`` docs whose file is no longer listed"""
+        docs = self.ingest(pdf_paths, kind)
+        keep = {doc.path for doc in docs}
+        for path in [d.path for d in self.documents(kind) if d.path not in keep]:
+            del self._docs[path]
+        return docs
+
+    def get(self, pdf_path):
+        return self._docs.get(str(pdf_path))
+
+    def documents(self, kind=None):
+        return [doc for doc in self._docs.values() if kind is None or doc.kind == kind]
+
+    def iter_clean_pages(self, docs, max_pages=None):
+        for doc in docs:
+            yield from doc.iter_clean_pages(max_pages)
+
+    def llama_documents(self, pdf_paths):
+        """Lazily yield llama_index Documents for ``pdf_paths``"""
+        for doc in self.ingest(pdf_paths, "data"):
+            yield from doc.iter_llama_documents()
+
+
+class CorpusWatcher(threading.Thread):
+    """Polls PDF folders and calls ``on_change()`` when a file is added,
+    modified or removed. Polling (not inotify) so it works everywhere."""
+
+    def __init__(self, folders, on_change, interval=5.0):
+        super().__init__(daemon=True, name="corpus-watcher")
+        self.folders = [Path(f) for f in folders]
+        self.on_change = on_change
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._snapshot = self.snapshot()
+
+    def snapshot(self):
+        state = {}
+        for folder in self.folders:
+            for pdf_path in folder.glob("*.pdf"):
+                try:
+                    stat = pdf_path.stat()
+                except OSError:
+                    continue
+                state[str(pdf_path)] = (stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            current = self.snapshot()
+            if current == self._snapshot:
+                continue
+            self._snapshot = current
+            print("👀 Corpus changed - syncing")
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"⚠️ Corpus sync failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
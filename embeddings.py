@@ -0,0 +1,339 @@
+"""Process-wide registry of warm embedding models.
+
+``HuggingFaceEmbedding`` takes seconds to load. ``get_embed_model`` loads
+each (model name, settings) combination once per process on first use and
+hands the same instance to every caller afterwards - generate_paper, the
+chat paths and every Streamlit rerun share it.
+
+``SQLiteEmbeddingCache`` plugs into llama_index's ``embeddings_cache`` hook
+so chunk embeddings persist across runs, keyed by (model name, SHA-256 of
+the whitespace-normalized chunk text). Rebuilding an index after a config
+or corpus change only embeds chunks whose text is actually new. The cache
+only answers inside its ``ingest()`` scope (index builds); query
+embeddings never reach SQLite.
+
+``QueryEmbeddingCache`` is an in-memory exact-match LRU for query strings:
+a repeated question is answered without touching the model (or SQLite).
+
+For bulk ingests ``embed_nodes_by_length`` sorts chunks by token length
+before batching (less padding per batch), and ``get_embed_model`` applies
+the configured batch size and torch intra-op thread count.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from llama_index.core.schema import MetadataMode
+from llama_index.core.storage.kvstore.types import BaseKVStore, DEFAULT_COLLECTION
+
+from cache_utils import HitStats, LRUCache
+
+try:
+    import psutil
+except ImportError:  # stats then just omit RSS
+    psutil = None
+
+_models = {}
+_stats = {}
+_caches = {}
+_query_caches = {}
+_lock = threading.Lock()
+
+
+def _rss_mb():
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def _param_mb(embed_model):
+    """Size of the model weights, if the backend exposes them"""
+    try:
+        return sum(p.numel() * p.element_size() for p in embed_model._model.parameters()) / 2**20
+    except Exception:
+        return None
+
+
+def _key(model_name, settings):
+    return model_name, tuple(sorted(settings.items()))
+
+
+class SQLiteEmbeddingCache(HitStats, BaseKVStore):
+    """Persistent chunk-embedding cache (llama_index ``embeddings_cache``).
+
+    llama_index calls ``get``/``put`` with the text it embeds as key; rows
+    are stored as float32 blobs under (model, sha256(normalized text)).
+    Chunks are embedded without their metadata header (see corpus.py), so
+    the key is the chunk body: a renamed or re-paginated PDF still hits.
+
+    Lookups only happen in a thread inside ``ingest()``; elsewhere (query
+    embedding on the shared model) ``get``/``put`` are no-ops. Writes inside
+    ``ingest()`` are committed in batches and once on exit, so no write
+    transaction outlives an index build.
+    """
+
+    COMMIT_EVERY = 256
+
+    def __init__(self, path, model_name):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._scope = threading.local()
+        self._pending = 0
+
+    @property
+    def active(self):
+        """True in a thread currently inside ``ingest()``"""
+        return getattr(self._scope, "depth", 0) > 0
+
+    @contextmanager
+    def ingest(self):
+        """Serve chunk embeddings in this thread; commit pending rows on exit"""
+        self._scope.depth = getattr(self._scope, "depth", 0) + 1
+        try:
+            yield self
+        finally:
+            self._scope.depth -= 1
+            if not self.active:
+                self.flush()
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+    def get(self, key, collection=DEFAULT_COLLECTION):
+        if not self.active:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE model = ? AND text_hash = ?",
+                (self.model_name, self.text_hash(key)),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"embedding": np.frombuffer(row[0], dtype=np.float32).tolist()}
+
+    def put(self, key, val, collection=DEFAULT_COLLECTION):
+        if not self.active:
+            return
+        vector = np.asarray(next(iter(val.values())), dtype=np.float32)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                    (self.model_name, self.text_hash(key), vector.tobytes()),
+                )
+                self._pending += 1
+                if self._pending >= self.COMMIT_EVERY:
+                    self._conn.commit()
+                    self._pending = 0
+            except sqlite3.Error as e:
+                # Losing cache rows only costs a re-embed next time
+                self._conn.rollback()
+                self._pending = 0
+                print(f"⚠️ Embedding cache write failed: {e}")
+
+    def flush(self):
+        with self._lock:
+            try:
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                print(f"⚠️ Embedding cache write failed: {e}")
+            self._pending = 0
+
+    def delete(self, key, collection=DEFAULT_COLLECTION):
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM embeddings WHERE model = ? AND text_hash = ?",
+                (self.model_name, self.text_hash(key)),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def get_all(self, collection=DEFAULT_COLLECTION):
+        # Keys are hashes, the original text is not stored
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT text_hash, vector FROM embeddings WHERE model = ?", (self.model_name,)
+            ).fetchall()
+        return {h: {"embedding": np.frombuffer(v, dtype=np.float32).tolist()} for h, v in rows}
+
+    async def aput(self, key, val, collection=DEFAULT_COLLECTION):
+        self.put(key, val, collection)
+
+    async def aget(self, key, collection=DEFAULT_COLLECTION):
+        return self.get(key, collection)
+
+    async def aget_all(self, collection=DEFAULT_COLLECTION):
+        return self.get_all(collection)
+
+    async def adelete(self, key, collection=DEFAULT_COLLECTION):
+        return self.delete(key, collection)
+
+
+def get_embedding_cache(path, model_name):
+    """One SQLiteEmbeddingCache per (file, model) per process"""
+    key = (str(Path(path).resolve()), model_name)
+    with _lock:
+        if key not in _caches:
+            _caches[key] = SQLiteEmbeddingCache(path, model_name)
+        return _caches[key]
+
+
+def embed_queries(embed_model, queries):
+    """Query embeddings for ``queries``, in one forward pass on HuggingFace
+    models (their ``_embed`` takes a list), else one call per query"""
+    batch_embed = getattr(embed_model, "_embed", None)
+    if callable(batch_embed):
+        return [list(embedding) for embedding in batch_embed(list(queries), prompt_name="query")]
+    return [embed_model.get_query_embedding(query) for query in queries]
+
+
+class QueryEmbeddingCache(LRUCache):
+    """Exact-match LRU of query embeddings for one model (in memory)"""
+
+    def __init__(self, model_name, max_entries=1024):
+        super().__init__(max_entries)
+        self.model_name = model_name
+
+    def get_query_embedding(self, embed_model, query):
+        embedding = self.get(query)
+        if embedding is None:
+            embedding = embed_model.get_query_embedding(query)
+            self.put(query, embedding)
+        return embedding
+
+    def get_query_embeddings(self, embed_model, queries):
+        """Embeddings for ``queries``; all misses are embedded in one pass"""
+        unique = list(dict.fromkeys(queries))
+        embeddings = {query: self.get(query) for query in unique}
+        missing = [query for query in unique if embeddings[query] is None]
+        if missing:
+            for query, embedding in zip(missing, embed_queries(embed_model, missing)):
+                embeddings[query] = embedding
+                self.put(query, embedding)
+        return [embeddings[query] for query in queries]
+
+
+def get_query_embedding_cache(model_name, max_entries=1024):
+    """One QueryEmbeddingCache per model per process"""
+    with _lock:
+        if model_name not in _query_caches:
+            _query_caches[model_name] = QueryEmbeddingCache(model_name, max_entries)
+        cache = _query_caches[model_name]
+        cache.max_entries = max_entries
+        return cache
+
+
+def set_torch_threads(threads):
+    """Intra-op CPU threads for torch (process-wide); 0/None keeps the default"""
+    if not threads:
+        return
+    import torch
+    if torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+
+
+def get_embed_model(model_name, cache_path=None, threads=0, **settings):
+    """Shared HuggingFaceEmbedding for ``model_name`` + ``settings``.
+
+    ``settings`` go to HuggingFaceEmbedding (e.g. ``embed_batch_size``,
+    ``device``). With ``cache_path`` the instance reads/writes chunk
+    embeddings through the persistent SQLite cache at that path while a
+    build runs inside ``embed_model.embeddings_cache.ingest()``.
+    """
+    set_torch_threads(threads)
+    embed_model = _load_embed_model(model_name, **settings)
+    if cache_path is not None:
+        embed_model.embeddings_cache = get_embedding_cache(cache_path, model_name)
+    return embed_model
+
+
+def _load_embed_model(model_name, **settings):
+    key = _key(model_name, settings)
+    with _lock:
+        if key in _models:
+            _stats[key]["uses"] += 1
+            return _models[key]
+
+        # Imported here so a missing torch/sentence-transformers only fails
+        # the dense path (callers can fall back to BM25)
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        embed_model = HuggingFaceEmbedding(model_name=model_name, **settings)
+        load_seconds = time.perf_counter() - start
+        rss_after = _rss_mb()
+
+        _models[key] = embed_model
+        _stats[key] = {
+            "model": model_name,
+            "settings": dict(settings),
+            "load_seconds": round(load_seconds, 3),
+            "rss_delta_mb": round(rss_after - rss_before, 1) if rss_after is not None else None,
+            "weights_mb": _param_mb(embed_model),
+            "uses": 1,
+        }
+        print(f"🧠 Loaded {model_name} in {load_seconds:.1f}s")
+        return embed_model
+
+
+def token_lengths(texts, embed_model):
+    """Token counts from the model's tokenizer, else character counts"""
+    try:
+        tokenizer = embed_model._model.tokenizer
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+    except Exception:
+        return [len(text) for text in texts]
+
+
+def embed_texts_by_length(texts, embed_model):
+    """Embed ``texts`` in length-sorted batches, returned in input order"""
+    lengths = token_lengths(texts, embed_model)
+    order = sorted(range(len(texts)), key=lengths.__getitem__)
+    sorted_embeddings = embed_model.get_text_embedding_batch([texts[i] for i in order])
+    embeddings = [None] * len(texts)
+    for position, i in enumerate(order):
+        embeddings[i] = sorted_embeddings[position]
+    return embeddings
+
+
+def embed_nodes_by_length(nodes, embed_model):
+    """Fill ``node.embedding`` for nodes that have none, length-bucketed"""
+    pending = [node for node in nodes if node.embedding is None]
+    if not pending:
+        return
+    texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in pending]
+    for node, embedding in zip(pending, embed_texts_by_length(texts, embed_model)):
+        node.embedding = embedding
+
+
+def embedding_stats():
+    """Load time / memory / use count of every model loaded in this process"""
+    with _lock:
+        return [dict(stats) for stats in _stats.values()]
+
+
+def clear_embed_models():
+    with _lock:
+        _models.clear()
+        _stats.clear()
+        _caches.clear()
+        _query_caches.clear()
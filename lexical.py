@@ -0,0 +1,211 @@
+"""BM25 lexical retrieval over RAG chunks, and RRF fusion with dense results.
+
+Chunks live in a SQLite table with an FTS5 inverted index (porter-stemmed,
+ranked with FTS5's built-in ``bm25()``), so drug names and MedDRA codes
+match exactly even where MiniLM vectors blur them. The index is persisted
+next to the vector index and kept in sync with it during ingestion; it
+stores chunk text + metadata, so it can also answer on its own when no
+embedding model is available.
+"""
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import MetadataMode, NodeWithScore, TextNode
+
+from cache_utils import content_version
+from vector_stores import retrieve_batch
+
+_indexes = {}
+_lock = threading.Lock()
+
+QUERY_TOKEN = re.compile(r"\w+")
+
+
+def fts_query(text):
+    """FTS5 MATCH expression: any of the query's words, each quoted"""
+    tokens = dict.fromkeys(token.lower() for token in QUERY_TOKEN.findall(text))
+    return " OR ".join(f'"{token}"' for token in tokens)
+
+
+class BM25Index:
+    """Persistent chunk store + FTS5 inverted index"""
+
+    COMMIT_EVERY = 512
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " id INTEGER PRIMARY KEY, node_id TEXT UNIQUE NOT NULL, ref_doc_id TEXT,"
+            " file_name TEXT, page_label TEXT, metadata TEXT NOT NULL, text TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS chunks_ref ON chunks(ref_doc_id);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5("
+            " text, content='chunks', content_rowid='id', tokenize='porter unicode61');"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _delete_rows(self, rows):
+        for row_id, text in rows:
+            self._conn.execute(
+                "INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES('delete', ?, ?)", (row_id, text)
+            )
+            self._conn.execute("DELETE FROM chunks WHERE id = ?", (row_id,))
+
+    def add_nodes(self, nodes):
+        """Index chunk nodes (re-adding a node id replaces it)"""
+        with self._lock:
+            for node in nodes:
+                self._delete_rows(self._conn.execute(
+                    "SELECT id, text FROM chunks WHERE node_id = ?", (node.node_id,)
+                ).fetchall())
+                text = node.get_content(metadata_mode=MetadataMode.NONE)
+                cursor = self._conn.execute(
+                    "INSERT INTO chunks (node_id, ref_doc_id, file_name, page_label, metadata, text)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (node.node_id, node.ref_doc_id, node.metadata.get("file_name"),
+                     str(node.metadata.get("page_label")), json.dumps(node.metadata), text),
+                )
+                self._conn.execute("INSERT INTO chunks_fts(rowid, text) VALUES (?, ?)",
+                                   (cursor.lastrowid, text))
+            self._pending += len(nodes)
+            if self._pending >= self.COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+
+    def delete_ref_doc(self, ref_doc_id):
+        with self._lock:
+            self._delete_rows(self._conn.execute(
+                "SELECT id, text FROM chunks WHERE ref_doc_id = ?", (ref_doc_id,)
+            ).fetchall())
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("INSERT INTO chunks_fts(chunks_fts) VALUES('delete-all')")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               (key, json.dumps(value, sort_keys=True)))
+            self._conn.commit()
+
+    @property
+    def version(self):
+        """Content version of the indexed corpus (settings + file hashes)"""
+        signature = {k: v for k, v in (self.get_meta("index") or {}).items() if k != "stats"}
+        return content_version(signature)
+
+    @property
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(self, query, top_k, file_names=None, pages=None):
+        """[(node_id, score, text, metadata)] best first; score = -bm25 (higher is better)"""
+        match = fts_query(query)
+        if not match or top_k <= 0:
+            return []
+        sql = ("SELECT c.node_id, -bm25(chunks_fts), c.text, c.metadata"
+               " FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid"
+               " WHERE chunks_fts MATCH ?")
+        params = [match]
+        if file_names:
+            sql += f" AND c.file_name IN ({','.join('?' * len(file_names))})"
+            params += list(file_names)
+        if pages:
+            sql += f" AND c.page_label IN ({','.join('?' * len(pages))})"
+            params += [str(p) for p in pages]
+        sql += " ORDER BY bm25(chunks_fts) LIMIT ?"
+        params.append(top_k)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(node_id, score, text, json.loads(metadata)) for node_id, score, text, metadata in rows]
+
+
+def get_bm25_index(path):
+    """One BM25Index per file per process"""
+    key = str(Path(path).resolve())
+    with _lock:
+        if key not in _indexes:
+            _indexes[key] = BM25Index(path)
+        return _indexes[key]
+
+
+class BM25Retriever(BaseRetriever):
+    """Top-k chunks by BM25 alone"""
+
+    def __init__(self, bm25_index, similarity_top_k=2, file_names=None, pages=None):
+        super().__init__()
+        self.bm25_index = bm25_index
+        self.similarity_top_k = similarity_top_k
+        self.file_names = file_names
+        self.pages = pages
+
+    def _retrieve(self, query_bundle):
+        hits = self.bm25_index.search(query_bundle.query_str, self.similarity_top_k,
+                                      self.file_names, self.pages)
+        return [NodeWithScore(node=TextNode(id_=node_id, text=text, metadata=metadata), score=score)
+                for node_id, score, text, metadata in hits]
+
+    def retrieve_batch(self, query_bundles):
+        return [self._retrieve(bundle) for bundle in query_bundles]
+
+
+class HybridRetriever(BaseRetriever):
+    """Reciprocal-rank fusion of dense and BM25 results.
+
+    Each retriever contributes ``1 / (rrf_k + rank)`` per chunk; both are
+    asked for ``candidates`` chunks and the best ``similarity_top_k`` fused
+    chunks are returned (score = fused RRF score).
+    """
+
+    def __init__(self, dense_retriever, bm25_retriever, similarity_top_k=2, candidates=20, rrf_k=60):
+        super().__init__()
+        self.dense_retriever = dense_retriever
+        self.bm25_retriever = bm25_retriever
+        self.similarity_top_k = similarity_top_k
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        dense_retriever.similarity_top_k = max(candidates, similarity_top_k)
+        bm25_retriever.similarity_top_k = max(candidates, similarity_top_k)
+
+    def _fuse(self, *ranked_lists):
+        fused, nodes = {}, {}
+        for hits in ranked_lists:
+            for rank, hit in enumerate(hits, 1):
+                node_id = hit.node.node_id
+                fused[node_id] = fused.get(node_id, 0.0) + 1.0 / (self.rrf_k + rank)
+                nodes.setdefault(node_id, hit.node)
+        best = sorted(fused, key=fused.get, reverse=True)[:self.similarity_top_k]
+        return [NodeWithScore(node=nodes[node_id], score=fused[node_id]) for node_id in best]
+
+    def _retrieve(self, query_bundle):
+        return self._fuse(self.dense_retriever.retrieve(query_bundle),
+                          self.bm25_retriever.retrieve(query_bundle))
+
+    def retrieve_batch(self, query_bundles):
+        """Fused hits per query; the dense side searches all queries at once"""
+        dense = retrieve_batch(self.dense_retriever, query_bundles)
+        lexical = self.bm25_retriever.retrieve_batch(query_bundles)
+        return [self._fuse(d, l) for d, l in zip(dense, lexical)]
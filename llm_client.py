@@ -0,0 +1,324 @@
+"""LLM call helpers shared by paper_generator.py and web_app.py.
+
+``get_llm`` hands out one long-lived Ollama client per (model, server,
+settings) per process. Its httpx connection pool keeps connections alive
+between requests, and Ollama's ``keep_alive`` keeps the model loaded on the
+server between calls instead of cold-loading it each time.
+
+``stream_completion`` wraps ``llm.stream_complete`` and yields text deltas as
+Ollama produces them (Streamlit's ``st.write_stream`` and the CLI consume it
+directly). Every call records time-to-first-token (TTFT) and decode speed in
+tokens/sec; ``llm_stats`` summarises the recent calls for the web app's
+Runtime stats panel.
+
+``SQLiteResponseCache`` stores finished completions on disk, keyed by a hash
+of (prompt, model, server, model identity, generation options), with a
+per-entry TTL and a size cap
+evicting the least recently used rows. Pass it as ``cache`` to replay an
+unchanged prompt without calling the model; ``bypass`` skips the lookup but
+still refreshes the stored answer.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import httpx
+from llama_index.llms.ollama import Ollama
+from ollama import Client
+
+from cache_utils import HitStats
+
+# Per-call records kept for llm_stats
+MAX_RECORDED_CALLS = 200
+
+# LLM fields that only affect transport, not the generated text. base_url
+# stays in the cache key: another server may serve another build (or a stub)
+TRANSPORT_FIELDS = {"request_timeout", "keep_alive", "class_name"}
+
+# /api/show fields that identify the model build a server answers with
+IDENTITY_FIELDS = ("modelfile", "template", "parameters", "details", "modelinfo")
+
+_calls = deque(maxlen=MAX_RECORDED_CALLS)
+_caches = {}
+_identities = {}
+_llms = {}
+_llm_uses = {}
+_lock = threading.Lock()
+
+
+def get_llm(model, base_url="http://localhost:11434", request_timeout=120.0, keep_alive="30m",
+            pool_connections=8, **options):
+    """Shared Ollama LLM for ``model`` with a keep-alive HTTP connection pool.
+
+    ``request_timeout`` is per request (seconds); ``keep_alive`` is how long
+    Ollama keeps the model in memory after a call (e.g. "30m", -1 = forever);
+    ``pool_connections`` caps concurrent/kept-alive connections (keep it at
+    least ``llm_concurrency``). ``options`` go to llama_index's Ollama.
+    """
+    key = (model, base_url, request_timeout, keep_alive, pool_connections,
+           json.dumps(options, sort_keys=True, default=str))
+    with _lock:
+        if key not in _llms:
+            client = Client(
+                host=base_url, timeout=request_timeout,
+                limits=httpx.Limits(max_connections=pool_connections,
+                                    max_keepalive_connections=pool_connections),
+            )
+            _llms[key] = Ollama(model=model, base_url=base_url, request_timeout=request_timeout,
+                                keep_alive=keep_alive, client=client, **options)
+            _llm_uses[key] = 0
+        _llm_uses[key] += 1
+        return _llms[key]
+
+
+def llm_clients():
+    """Model / server / use count of every shared LLM client in this process"""
+    with _lock:
+        return [{"model": key[0], "base_url": key[1], "keep_alive": key[3], "uses": _llm_uses[key]}
+                for key in _llms]
+
+
+def model_identity(llm):
+    """Hash of what the server reports for ``llm.model`` (``/api/show``), looked
+    up once per (server, model) per process; None if the server cannot say"""
+    key = (getattr(llm, "base_url", None), getattr(llm, "model", None))
+    with _lock:
+        if key in _identities:
+            return _identities[key]
+    try:
+        info = llm.client.show(llm.model).model_dump(include=set(IDENTITY_FIELDS))
+    except Exception:
+        return None  # not remembered: retried on the next call
+    identity = hashlib.sha256(json.dumps(info, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    with _lock:
+        _identities[key] = identity
+    return identity
+
+
+def generation_options(llm):
+    """Model name + identity, server and every setting that shapes the output"""
+    try:
+        # Ollama resolves context_window (-1) from the server on first use;
+        # resolve it up front so the key is the same before and after
+        if getattr(llm, "context_window", None) == -1:
+            llm.get_context_window()
+        settings = llm.to_dict()
+    except Exception:
+        settings = {"model": getattr(llm, "model", None), "base_url": getattr(llm, "base_url", None)}
+    options = {k: v for k, v in settings.items() if k not in TRANSPORT_FIELDS}
+    options["model_identity"] = model_identity(llm)
+    return options
+
+
+class SQLiteResponseCache(HitStats):
+    """Persistent LLM response cache with per-entry TTL and LRU size cap.
+
+    Every write (LRU touch included) is committed at once, so no write
+    transaction is left open to block other processes sharing the file.
+    """
+
+    def __init__(self, path, max_entries=5000, ttl_seconds=7 * 24 * 3600):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL,"
+            " created REAL NOT NULL, expires REAL, last_used REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_used);"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt, options):
+        payload = json.dumps({"prompt": prompt, "options": options}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            try:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            except sqlite3.Error:
+                # LRU order is best effort; the cached answer is still valid
+                self._conn.rollback()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response, model=None, ttl_seconds=None):
+        """Store ``response``; ``ttl_seconds`` overrides the default (0/None = never expires)"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created, expires, last_used)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, now, now + ttl if ttl else None, now),
+                )
+                self._evict()
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM responses WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+        if self.max_entries > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    @property
+    def count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        return {"entries": self.count, **super().stats()}
+
+
+def get_response_cache(path, max_entries=5000, ttl_seconds=7 * 24 * 3600):
+    """One SQLiteResponseCache per file per process (limits follow the latest caller)"""
+    key = str(Path(path).resolve())
+    with _lock:
+        if key not in _caches:
+            _caches[key] = SQLiteResponseCache(path, max_entries, ttl_seconds)
+        cache = _caches[key]
+        cache.max_entries, cache.ttl_seconds = max_entries, ttl_seconds
+        return cache
+
+
+def _record(llm, label, start, first, end, tokens, cached=False):
+    call = {
+        "label": label,
+        "model": getattr(llm, "model", None),
+        "cached": cached,
+        "ttft_s": round(first - start, 3) if first is not None else None,
+        "total_s": round(end - start, 3),
+        "tokens": tokens,
+        "tokens_per_s": round(tokens / (end - first), 1) if first is not None and end > first else None,
+    }
+    with _lock:
+        _calls.append(call)
+    return call
+
+
+def stream_completion(llm, prompt, label="llm", stats=None, cache=None, bypass=False):
+    """Yield the completion of ``prompt`` delta by delta, recording TTFT and tokens/sec.
+
+    Token counts come from Ollama's final ``eval_count`` when present, else
+    one token per streamed delta. A ``stats`` dict receives this call's record.
+    With a ``cache`` (SQLiteResponseCache) a stored answer is yielded in one
+    piece; ``bypass`` forces a fresh generation. Only complete streams are stored.
+    """
+    start = time.perf_counter()
+    key = None
+    if cache is not None:
+        key = cache.key(prompt, generation_options(llm))
+        cached = None
+        if not bypass:
+            try:
+                cached = cache.get(key)
+            except sqlite3.Error as e:
+                print(f"⚠️ LLM cache read failed, generating: {e}")
+        if cached is not None:
+            call = _record(llm, label, start, time.perf_counter(), time.perf_counter(),
+                           0, cached=True)
+            if stats is not None:
+                stats.update(call)
+            yield cached
+            return
+
+    first, deltas, eval_count, parts, finished = None, 0, None, [], False
+    try:
+        for response in llm.stream_complete(prompt):
+            raw = response.raw if isinstance(response.raw, dict) else {}
+            if raw.get("eval_count"):
+                eval_count = raw["eval_count"]
+            if response.delta:
+                if first is None:
+                    first = time.perf_counter()
+                deltas += 1
+                parts.append(response.delta)
+                yield response.delta
+        finished = True
+    finally:
+        call = _record(llm, label, start, first, time.perf_counter(), eval_count or deltas)
+        if stats is not None:
+            stats.update(call)
+        if finished and key is not None and parts:
+            try:
+                cache.put(key, "".join(parts), model=call["model"])
+            except sqlite3.Error as e:
+                # The answer is fine; only the cache copy is lost
+                print(f"⚠️ LLM cache write failed: {e}")
+
+
+def stream_text(llm, prompt, on_token=None, label="llm", stats=None, cache=None, bypass=False):
+    """Full completion text; ``on_token(delta)`` sees each delta as it arrives"""
+    parts = []
+    for delta in stream_completion(llm, prompt, label, stats, cache, bypass):
+        parts.append(delta)
+        if on_token is not None:
+            on_token(delta)
+    return "".join(parts)
+
+
+def print_token(delta):
+    print(delta, end="", flush=True)
+
+
+def format_call(call):
+    """'TTFT 0.42s · 38.5 tok/s · 212 tokens' for CLI / UI captions"""
+    if not call:
+        return ""
+    if call.get("cached"):
+        return f"cached · {call['total_s'] * 1000:.0f} ms"
+    ttft = f"{call['ttft_s']:.2f}s" if call["ttft_s"] is not None else "n/a"
+    speed = f"{call['tokens_per_s']:.1f} tok/s" if call["tokens_per_s"] is not None else "n/a"
+    return f"TTFT {ttft} · {speed} · {call['tokens']} tokens"
+
+
+def llm_stats():
+    """Median TTFT / tokens/sec over the generated (not cached) calls, plus the last few"""
+    with _lock:
+        calls = list(_calls)
+    generated = [call for call in calls if not call["cached"]]
+
+    def median(values):
+        values = sorted(v for v in values if v is not None)
+        return values[len(values) // 2] if values else None
+
+    return {
+        "calls": len(calls),
+        "cache_hits": len(calls) - len(generated),
+        "ttft_s_p50": median(call["ttft_s"] for call in generated),
+        "tokens_per_s_p50": median(call["tokens_per_s"] for call in generated),
+        "recent": calls[-5:],
+    }
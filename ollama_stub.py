@@ -0,0 +1,247 @@
+"""Ollama-compatible stub server for offline benchmarks and tests.
+
+Speaks the parts of the Ollama HTTP API the pipeline uses
+(``/api/generate``, ``/api/chat``, ``/api/show``, ``/api/tags``,
+``/api/version``), streaming NDJSON or answering in one JSON body like
+``ollama serve``. Answers are deterministic: the same model + prompt always
+yields the same words. Time-to-first-token, per-token latency, parallel
+request slots and failure injection are configurable, so throughput and
+concurrency features can be measured without a model.
+
+    python ollama_stub.py [--port 11435] [--ttft 0.2] [--token-latency 0.02] [--tokens 64]
+                          [--parallel 4] [--fail-rate 0.1] [--fail-status 500] [--seed 0]
+
+then point ``ollama_base_url`` in config.yaml at it. In-process use::
+
+    server = start_stub_server(ttft=0.1, token_latency=0.01)
+    ...  # server.url
+    server.shutdown()
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VOCAB = ("pharmacovigilance signal detection adverse drug reaction reporting benzodiazepine "
+         "insomnia ontology physician notes daytime impairment risk management regulatory "
+         "assessment cohort exposure outcome MedDRA EudraVigilance trazodone causality "
+         "disproportionality analysis case narrative seriousness labelling").split()
+CONTEXT_LENGTH = 131072
+STUB_IDENTITY = "ollama-stub"
+
+
+class StubSettings:
+    """Latency / failure knobs shared by every request of one server"""
+
+    def __init__(self, ttft=0.2, token_latency=0.02, tokens=64, parallel=4,
+                 fail_rate=0.0, fail_status=500, seed=0):
+        self.ttft = ttft
+        self.token_latency = token_latency
+        self.tokens = tokens
+        self.parallel = parallel
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(parallel) if parallel > 0 else None
+        self.requests = 0
+        self.failures = 0
+
+    def should_fail(self):
+        """Seeded, so a run injects the same failures in the same order"""
+        with self._lock:
+            self.requests += 1
+            fail = self.fail_rate > 0 and self._rng.random() < self.fail_rate
+            self.failures += fail
+            return fail
+
+
+def stub_tokens(model, prompt, count):
+    """Deterministic answer for (model, prompt) as ``count`` word tokens"""
+    seed = int.from_bytes(hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    words = [rng.choice(VOCAB) for _ in range(count)]
+    return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like ollama serve
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/":
+            data = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-stub"})
+        elif self.path == "/api/tags":
+            self._send_json({"models": []})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+        except ValueError:
+            self._send_json({"error": "invalid JSON"}, 400)
+            return
+        if self.path == "/api/show":
+            # Never the identity of a real model: cached answers from the stub
+            # must not be replayed once ollama_base_url points at Ollama again
+            self._send_json({
+                "modelfile": f"# {STUB_IDENTITY}", "parameters": "", "template": "{{ .Prompt }}",
+                "details": {"family": STUB_IDENTITY, "parameter_size": "0B", "quantization_level": "none"},
+                "model_info": {"general.architecture": STUB_IDENTITY,
+                               "general.name": f"{STUB_IDENTITY}/{request.get('model', 'stub')}",
+                               f"{STUB_IDENTITY}.context_length": CONTEXT_LENGTH},
+                "capabilities": ["completion"], "modified_at": _now(),
+            })
+        elif self.path == "/api/generate":
+            self._answer(request, request.get("prompt", ""), chat=False)
+        elif self.path == "/api/chat":
+            prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+            self._answer(request, prompt, chat=True)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _chunk(self, model, text, chat, done, **extra):
+        body = {"model": model, "created_at": _now(), "done": done, **extra}
+        if chat:
+            body["message"] = {"role": "assistant", "content": text}
+        else:
+            body["response"] = text
+        return body
+
+    def _answer(self, request, prompt, chat):
+        settings = self.server.settings
+        model = request.get("model", "stub")
+        if settings.should_fail():
+            self._send_json({"error": "injected failure"}, settings.fail_status)
+            return
+        count = (request.get("options") or {}).get("num_predict") or settings.tokens
+        if count < 0:
+            count = settings.tokens
+        tokens = stub_tokens(model, prompt, count)
+        stream = request.get("stream", True)
+
+        if settings.slots is not None:
+            settings.slots.acquire()
+        try:
+            start = time.perf_counter()
+            time.sleep(settings.ttft)
+            if stream:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(settings.token_latency)
+                if stream:
+                    self._write_chunk(self._chunk(model, token, chat, False))
+            total_ns = int((time.perf_counter() - start) * 1e9)
+            final = dict(
+                done_reason="stop",
+                total_duration=total_ns,
+                load_duration=0,
+                prompt_eval_count=len(prompt.split()),
+                prompt_eval_duration=int(settings.ttft * 1e9),
+                eval_count=len(tokens),
+                eval_duration=max(0, total_ns - int(settings.ttft * 1e9)),
+            )
+            if stream:
+                self._write_chunk(self._chunk(model, "", chat, True, **final))
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                self._send_json(self._chunk(model, "".join(tokens), chat, True, **final))
+        finally:
+            if settings.slots is not None:
+                settings.slots.release()
+
+    def _write_chunk(self, body):
+        data = json.dumps(body).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings):
+        super().__init__(address, StubHandler)
+        self.settings = settings
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(host="127.0.0.1", port=0, **settings):
+    """Serve in a background thread (port 0 = any free port); stop with ``shutdown()``"""
+    server = StubServer((host, port), StubSettings(**settings))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds between tokens")
+    parser.add_argument("--tokens", type=int, default=64, help="tokens per answer (unless num_predict is set)")
+    parser.add_argument("--parallel", type=int, default=4,
+                        help="requests generated at once, like OLLAMA_NUM_PARALLEL (0 = unlimited)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--fail-status", type=int, default=500, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int, default=0, help="seed for failure injection")
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), StubSettings(
+        ttft=args.ttft, token_latency=args.token_latency, tokens=args.tokens, parallel=args.parallel,
+        fail_rate=args.fail_rate, fail_status=args.fail_status, seed=args.seed,
+    ))
+    print(f"🧪 Ollama stub on {server.url} (ttft {args.ttft}s, {args.token_latency}s/token, "
+          f"{args.parallel or 'unlimited'} parallel, fail rate {args.fail_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
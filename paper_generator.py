@@ -1,12 +1,22 @@
+import itertools
 import os
-import re
-import pdfplumber
+import time
 import yaml
 from pathlib import Path
 from collections import Counter
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.llms.ollama import Ollama
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llama_index.core import Settings
+from rag_index import load_or_build_index, load_or_build_bm25, chunk_id, index_version
+from embeddings import get_embed_model, get_query_embedding_cache
+from pdf_cache import PdfPageCache
+from corpus import DocumentStore, CorpusWatcher
+from terms import TermCollector, PhraseFilter, TermIndex, SpaceSaving, iter_candidates
+from normalizer import normalize_text
+from vector_stores import source_filters
+from lexical import get_bm25_index, BM25Retriever, HybridRetriever
+from retrieval_cache import get_retrieval_cache, CachedRetriever
+from llm_client import stream_text, print_token, format_call, get_response_cache, get_llm
 
 
 class PaperGenerator:
@@ -30,6 +40,24 @@ class PaperGenerator:
             print(f"❌ MISSING: {config_path}")
         
         self.ensure_output_folder()
+        # Built once per config load: bad_terms/skip_words automaton
+        self.phrase_filter = PhraseFilter(
+            self.config.get("bad_terms", []),
+            self.config.get("skip_words", []),
+            self.config.get("min_phrase_length", 12),
+            self.config.get("require_vowels", True),
+        )
+        self.term_index = TermIndex(self.get_cache_path() / "terms.json", self.phrase_filter)
+        self.page_cache = PdfPageCache(
+            self.get_cache_path() / "pages",
+            workers=self.config.get("extraction_workers", 0),
+            pages_per_task=self.config.get("extraction_pages_per_task", 8),
+            keep_in_memory=not self.config.get("stream_corpus", False),
+        )
+        self.corpus = DocumentStore(
+            self.page_cache, self.clean_text,
+            keep_pages=not self.config.get("stream_corpus", False),
+        )
 
     def _get_full_defaults(self):
         return {
@@ -48,6 +76,38 @@ class PaperGenerator:
             "chunk_size": 400,
             "chunk_overlap": 50,
             "top_k": 2,
+            "embed_model": "sentence-transformers/all-MiniLM-L6-v2",
+            "embed_device": None,
+            "embed_batch_size": 64,
+            "embed_threads": 0,
+            "embed_length_bucketing": True,
+            "vector_store": "simple",
+            "vector_store_options": {},
+            "rag_files": [],
+            "retrieval": "dense",
+            "hybrid_candidates": 20,
+            "rrf_k": 60,
+            "retrieval_cache_size": 256,
+            "query_embedding_cache_size": 1024,
+            "llm_concurrency": 2,
+            "llm_retries": 2,
+            "llm_retry_backoff": 2.0,
+            "ollama_base_url": "http://localhost:11434",
+            "llm_request_timeout": 120.0,
+            "llm_keep_alive": "30m",
+            "llm_pool_connections": 8,
+            "llm_cache": True,
+            "llm_cache_ttl_hours": 168,
+            "llm_cache_max_entries": 5000,
+            "cache_dir": ".rag_cache",
+            "extraction_workers": 0,
+            "extraction_pages_per_task": 8,
+            "incremental_sync": True,
+            "watch_corpus": False,
+            "watch_interval": 5,
+            "stream_corpus": False,
+            "term_ranking": "tfidf",
+            "heavy_hitters_memory_mb": 64,
             "references": {"count": 5},
             "journal_pool": ["Journal"],
         }
@@ -58,41 +118,30 @@ class PaperGenerator:
     def get_base_path(self):
         return Path(__file__).resolve().parent
 
+    def get_cache_path(self):
+        """Root folder for persisted indexes/caches (config: cache_dir)"""
+        return self.get_base_path() / self.config.get("cache_dir", ".rag_cache")
+
     def clean_text(self, text):
-        if not text: return ""
-        text = re.sub(r"\s+", " ", text)
-        text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
-        text = re.sub(r"[^A-Za-z0-9 .,;:()-]", " ", text)
-        return re.sub(r"\s+", " ", text).strip()
+        return normalize_text(text)
+
+    def term_collector(self):
+        return TermCollector(self.phrase_filter)
 
     def perfect_term_filter(self, all_text):
-        patterns = [
-            r'\b[A-Z][a-z]{4,}(?:\s+[A-Z][a-z]{4,}){0,2}\b',
-            r'\bPharmaco[A-Za-z]+\b',
-            r'\bRisk\s*[A-Za-z]+\b'
-        ]
-        bad_terms = set(self.config.get("bad_terms", []))
-        good_terms = []
-        
-        for pattern in patterns:
-            phrases = re.findall(pattern, all_text, re.IGNORECASE)
-            for phrase in phrases:
-                phrase_lower = phrase.lower()
-                if len(phrase_lower) >= self.config.get("min_phrase_length", 12):
-                    if not any(bad in phrase_lower for bad in bad_terms):
-                        good_terms.append(phrase.title())
-        
-        return list(dict.fromkeys(good_terms))[:3]
+        return self.term_collector().feed_stream([all_text]).terms()
+
+    def stream_term_filter(self, texts):
+        """perfect_term_filter over an iterable of pages, consumed lazily"""
+        return self.term_collector().feed_stream(texts).terms()
 
     def load_template(self):
         base_path = self.get_base_path()
         template_path = base_path / "docs" / "template.pdf"
         if template_path.exists():
             try:
-                with pdfplumber.open(template_path) as pdf:
-                    text = ""
-                    for page in pdf.pages[:1]:
-                        text += self.clean_text(page.extract_text() or "")
+                pages = self.page_cache.get_pages(template_path)
+                text = "".join(self.clean_text(page) for page in pages[:1])
                 print(f"📄 Template loaded: {template_path}")
                 return text
             except:
@@ -110,18 +159,18 @@ class PaperGenerator:
             print(f"❌ docs/sections/ folder not found")
             return section_texts
         
-        for section, pdf_name in self.config.get("section_pdfs", {}).items():
+        section_pdfs = self.config.get("section_pdfs", {})
+        self.corpus.sync([sections_folder / name for name in section_pdfs.values()
+                          if (sections_folder / name).exists()], "section")
+        for section, pdf_name in section_pdfs.items():
             pdf_path = sections_folder / pdf_name
             if pdf_path.exists():
-                try:
-                    text = ""
-                    with pdfplumber.open(pdf_path) as pdf:
-                        for page in pdf.pages:
-                            text += self.clean_text(page.extract_text() or "") + "\n"
-                    section_texts[section] = text
+                doc = self.corpus.get(pdf_path)
+                if doc:
+                    section_texts[section] = doc.clean_text()
                     print(f"✅ Section {section}: {pdf_path}")
-                except Exception as e:
-                    print(f"⚠️ Error {section}: {e}")
+                else:
+                    print(f"⚠️ Error {section}: could not extract {pdf_path}")
             else:
                 print(f"❌ Missing section {section}: {pdf_path}")
         
@@ -141,12 +190,10 @@ class PaperGenerator:
         
         return data_paths
 
-    def extract_terms(self):
+    def extract_terms(self, data_paths=None):
         """Extract terms from sections + data PDFs"""
         base_path = self.get_base_path()
         
-        all_text = ""
-        
         # Sections
         section_texts = self.load_section_pdfs()
         print("🔍 DEBUG SECTIONS:")
@@ -154,51 +201,200 @@ class PaperGenerator:
             pdf_path = (base_path / "docs" / "sections" / pdf_name)
             print(f"  '{section}' → '{pdf_name}' → {pdf_path} → EXISTS: {pdf_path.exists()}")
 
-        for content in section_texts.values():
-            all_text += content
-        
-        # Data PDFs (enrichment)
-        data_paths = self.load_data_pdfs()
-        base_path = self.get_base_path()
-        data_folder = base_path / "docs" / "data"
-        if data_folder.exists():
-            for pdf_path in data_folder.glob("*.pdf"):
-                try:
-                    with pdfplumber.open(pdf_path) as pdf:
-                        for page in pdf.pages[:3]:
-                            all_text += self.clean_text(page.extract_text() or "") + "\n"
-                except:
-                    continue
-        
-        terms = self.perfect_term_filter(all_text)
+        # Data PDFs (enrichment) - same ingested docs the RAG index is built from
+        if data_paths is None:
+            data_paths = self.load_data_pdfs()
+        data_docs = self.corpus.sync(data_paths, "data")
+        section_docs = [self.corpus.get(base_path / "docs" / "sections" / name)
+                        for name in self.config.get("section_pdfs", {}).values()]
+        section_docs = [d for d in section_docs if d]
+
+        ranking = self.config.get("term_ranking", "tfidf")
+        if ranking == "tfidf":
+            # Corpus-wide ranking: only new/changed PDFs are counted, the
+            # rest is a lookup in the persisted term index
+            self.term_index.sync(section_docs + data_docs)
+            terms = self.term_index.top_terms(3)
+        elif ranking == "heavy_hitters":
+            # Very large corpora: one streaming pass, fixed counter budget
+            sketch = SpaceSaving.from_memory_mb(self.config.get("heavy_hitters_memory_mb", 64))
+            pages = self.corpus.iter_clean_pages(section_docs + data_docs)
+            # No verdict memo here: it would grow with the distinct phrases
+            terms = sketch.update(iter_candidates(pages, self.phrase_filter, memo=False)).top_terms(3)
+        else:
+            # "first": first hits in document order, streamed page by page
+            pages = self.corpus.iter_clean_pages(section_docs)
+            data_pages = self.corpus.iter_clean_pages(data_docs, max_pages=3)
+            terms = self.stream_term_filter(itertools.chain(pages, data_pages))
         print(f"🔑 Extracted terms: {terms}")
         return terms, section_texts
 
-    def setup_rag(self, data_paths):
-        """RAG from docs/data/ ONLY"""
+    def configure_chunking(self):
+        Settings.chunk_size = self.config.get("chunk_size", 400)
+        Settings.chunk_overlap = self.config.get("chunk_overlap", 50)
+        Settings.node_parser.id_func = chunk_id
+
+    def configure_rag_settings(self):
+        self.configure_chunking()
+        # Warm per-process instance: loaded on first use, then reused
+        embed_settings = {"embed_batch_size": self.config.get("embed_batch_size", 64)}
+        if self.config.get("embed_device"):
+            embed_settings["device"] = self.config["embed_device"]
+        Settings.embed_model = get_embed_model(
+            self.config.get("embed_model", "sentence-transformers/all-MiniLM-L6-v2"),
+            cache_path=self.get_cache_path() / "embeddings.sqlite",
+            threads=self.config.get("embed_threads", 0),
+            **embed_settings,
+        )
+
+    def build_index(self, data_paths):
+        """Load/sync/build the persisted index (Settings must be configured)"""
+        embed_cache = Settings.embed_model.embeddings_cache
+        if embed_cache is not None:
+            embed_cache.reset_stats()
+        vector_store = self.config.get("vector_store", "simple")
+        # Chunk embeddings go through the SQLite cache only for this build
+        with embed_cache.ingest() if embed_cache is not None else nullcontext():
+            index = load_or_build_index(
+                data_paths, self.get_cache_path() / "index",
+                self.config.get("chunk_size", 400),
+                self.config.get("chunk_overlap", 50),
+                self.config.get("embed_model", "sentence-transformers/all-MiniLM-L6-v2"),
+                self.corpus.llama_documents,
+                incremental=self.config.get("incremental_sync", True),
+                bucket_by_length=self.config.get("embed_length_bucketing", True),
+                vector_store=vector_store,
+                vector_store_options=(self.config.get("vector_store_options") or {}).get(vector_store),
+                # Kept for every mode: BM25 is also the fallback without embeddings
+                bm25_index=self.bm25_index(),
+            )
+        if embed_cache is not None and embed_cache.hits + embed_cache.misses:
+            stats = embed_cache.stats()
+            print(f"🧮 Embedding cache: {stats['hits']} hits / {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate)")
+        return index
+
+    def bm25_index(self):
+        """The one BM25 index, persisted next to the vector index and kept in
+        step with it; hybrid, bm25 and the fallback all read it"""
+        return get_bm25_index(self.get_cache_path() / "index" / "bm25.sqlite")
+
+    def lexical_retriever(self, data_paths, file_names=None, pages=None):
+        """BM25-only retriever: needs no embedding model (reuses the BM25
+        index built with the vectors when it matches the files)"""
+        self.configure_chunking()
+        bm25_index = load_or_build_bm25(
+            data_paths, self.bm25_index(),
+            self.config.get("chunk_size", 400),
+            self.config.get("chunk_overlap", 50),
+            self.corpus.llama_documents,
+        )
+        return BM25Retriever(bm25_index, self.config.get("top_k", 2), file_names, pages)
+
+    def cached_retriever(self, retriever, retrieval, file_names=None, pages=None):
+        """Serve repeated queries from the process-wide retrieval cache"""
+        if retrieval == "bm25":
+            version, query_embeddings = (lambda: retriever.bm25_index.version), None
+        else:
+            index_dir = self.get_cache_path() / "index"
+            version = lambda: index_version(index_dir)
+            query_embeddings = get_query_embedding_cache(
+                self.config.get("embed_model", "sentence-transformers/all-MiniLM-L6-v2"),
+                self.config.get("query_embedding_cache_size", 1024),
+            )
+        return CachedRetriever(
+            retriever, get_retrieval_cache(self.config.get("retrieval_cache_size", 256)), version,
+            scope=(retrieval, tuple(file_names or ()), tuple(pages or ())),
+            top_k=self.config.get("top_k", 2),
+            query_embeddings=query_embeddings, embed_model=Settings.embed_model if query_embeddings else None,
+        )
+
+    def sync_corpus(self):
+        """Bring the section store and RAG index up to date with docs/"""
+        self.load_section_pdfs()
+        data_paths = self.load_data_pdfs()
+        self.corpus.sync(data_paths, "data")
+        if not data_paths:
+            return
+        # Refresh whichever index setup_rag reads for the configured mode
+        if self.config.get("retrieval", "dense") == "bm25":
+            self.lexical_retriever(data_paths)
+            return
+        try:
+            self.configure_rag_settings()
+            self.build_index(data_paths)
+        except Exception as e:
+            print(f"⚠️ Vector index sync failed: {e} - syncing BM25 only")
+            self.lexical_retriever(data_paths)
+
+    def start_watcher(self):
+        """Background poller that re-syncs the corpus when docs/ changes"""
+        docs_path = self.get_base_path() / "docs"
+        watcher = CorpusWatcher(
+            [docs_path / "data", docs_path / "sections"],
+            self.sync_corpus,
+            interval=self.config.get("watch_interval", 5),
+        )
+        watcher.start()
+        print(f"👀 Watching docs/data + docs/sections every {watcher.interval}s")
+        return watcher
+
+    def setup_rag(self, data_paths, file_names=None, pages=None):
+        """RAG from docs/data/ ONLY
+
+        ``file_names`` / ``pages`` restrict retrieval to those source PDFs /
+        page labels (default: config ``rag_files``, all pages).
+        """
         if not data_paths:
             print("⚠️ No RAG data - LLM only mode")
-            return None, Ollama(model=self.config.get("llm_model", "llama3.2:1b"))
+            return None, self.get_llm()
         
+        file_names = file_names or self.config.get("rag_files")
+        retrieval = self.config.get("retrieval", "dense")
+        top_k = self.config.get("top_k", 2)
         try:
-            Settings.chunk_size = self.config.get("chunk_size", 400)
-            Settings.chunk_overlap = self.config.get("chunk_overlap", 50)
-            Settings.embed_model = HuggingFaceEmbedding("sentence-transformers/all-MiniLM-L6-v2")
-            documents = SimpleDirectoryReader(input_files=data_paths).load_data()
-            index = VectorStoreIndex.from_documents(documents)
-            retriever = index.as_retriever(similarity_top_k=self.config.get("top_k", 2))
-            llm = Ollama(model=self.config.get("llm_model", "llama3.2:1b"))
-            print(f"🚀 RAG ready with {len(data_paths)} data PDFs")
+            if retrieval == "bm25":
+                retriever = self.lexical_retriever(data_paths, file_names, pages)
+            else:
+                self.configure_rag_settings()
+                # Persisted index: reloaded, or synced for changed PDFs only
+                index = self.build_index(data_paths)
+                retriever = index.as_retriever(
+                    similarity_top_k=top_k, filters=source_filters(file_names, pages),
+                )
+                if retrieval == "hybrid":
+                    retriever = HybridRetriever(
+                        retriever, BM25Retriever(self.bm25_index(), top_k, file_names, pages), top_k,
+                        candidates=self.config.get("hybrid_candidates", 20),
+                        rrf_k=self.config.get("rrf_k", 60),
+                    )
+            retriever = self.cached_retriever(retriever, retrieval, file_names, pages)
+            llm = self.get_llm()
+            print(f"🚀 RAG ready with {len(data_paths)} data PDFs ({retrieval})")
             return retriever, llm
         except Exception as e:
             print(f"⚠️ RAG failed: {e}")
-            return None, Ollama(model=self.config.get("llm_model", "llama3.2:1b"))
+            # Dense/hybrid: the embedding model or index is unavailable (e.g.
+            # torch missing) - BM25 needs neither, whatever the configured mode
+            if retrieval != "bm25":
+                try:
+                    retriever = self.cached_retriever(
+                        self.lexical_retriever(data_paths, file_names, pages), "bm25", file_names, pages
+                    )
+                    print(f"🔤 Falling back to BM25-only retrieval ({retrieval} unavailable)")
+                    return retriever, self.get_llm()
+                except Exception as e:
+                    print(f"⚠️ BM25 fallback failed: {e}")
+            return None, self.get_llm()
 
-    def generate_paper(self):
+    def generate_paper(self, bypass_cache=False):
+        """Build + save the paper; ``bypass_cache`` regenerates every section
+        even if an identical prompt is in the LLM response cache"""
         base_path = self.get_base_path()
         
-        # 1. Extract terms & load sections
-        terms, section_texts = self.extract_terms()
+        # 1. Ingest once: sections + data PDFs feed both terms and RAG
+        data_paths = self.load_data_pdfs()
+        terms, section_texts = self.extract_terms(data_paths)
         
         # 2. Generate title/abstract from YAML
         title = self.config["title_template"].format(
@@ -217,7 +413,6 @@ class PaperGenerator:
             affiliations += f", {self.config.get('city')}, {self.config.get('country', '')}"
 
         # 4. RAG from data/ folder only
-        data_paths = self.load_data_pdfs()
         retriever, llm = self.setup_rag(data_paths)
 
         # 5. Build paper
@@ -232,44 +427,55 @@ class PaperGenerator:
         paper += f"## Abstract\n{abstract}\n\n"
         paper += f"**Index Terms**— {', '.join(terms).lower()}\n\n"
 
-        # 6. RAG-ENHANCED sections
+        # 6. RAG-ENHANCED sections: context for every section up front
+        # (one batched embed + search) before the first LLM call
+        sections = [section for section in self.config.get("sections", {}).get("order", [])
+                    if section_texts.get(section, "").strip()]
+        contexts = {}
+        if retriever and sections:
+            queries = [f"pharmacovigilance {section.lower()} methods" for section in sections]
+            for section, context_nodes in zip(sections, retriever.retrieve_batch(queries)):
+                contexts[section] = "\n".join([node.text[:500] for node in context_nodes])
+
+        prompts = {}
+        for section in sections:
+            original_content = section_texts[section]
+
+            # RAG query: Enhance this section
+            enhancement_prompt = f"""
+            ORIGINAL: {original_content[:3000]}
+
+            Rewrite this {section} for Drug Safety journal:
+            - Keep ALL technical content and facts  
+            - Improve scientific writing style ONLY
+            - Smooth transitions ONLY
+            - NO SUBSECTION HEADERS like **Background**, **Recent Findings**
+            - NO bold subsection titles
+            - Continuous flowing narrative like real journal papers
+            - 400-600 words
+            - Add 1-2 citations [1],[2]
+
+            Keep SAME format as input - NO new subsections.
+
+            ENHANCED VERSION:
+            """
+
+            # Use RAG context if available
+            if retriever:
+                prompts[section] = f"{enhancement_prompt}\n\nRAG CONTEXT:\n{contexts[section]}"
+            else:
+                prompts[section] = enhancement_prompt
+
+        # Generate enhanced content (concurrently), assembled in section order
+        enhanced = self.enhance_sections(llm, prompts, bypass_cache)
         sections_used = 0
-        for section in self.config.get("sections", {}).get("order", []):
-            original_content = section_texts.get(section, "")
-            if original_content.strip():
-                
-                # RAG query: Enhance this section
-                enhancement_prompt = f"""
-                ORIGINAL: {original_content[:3000]}
-
-                Rewrite this {section} for Drug Safety journal:
-                - Keep ALL technical content and facts  
-                - Improve scientific writing style ONLY
-                - Smooth transitions ONLY
-                - NO SUBSECTION HEADERS like **Background**, **Recent Findings**
-                - NO bold subsection titles
-                - Continuous flowing narrative like real journal papers
-                - 400-600 words
-                - Add 1-2 citations [1],[2]
-
-                Keep SAME format as input - NO new subsections.
-
-                ENHANCED VERSION:
-                """
-                
-                # Use RAG context if available
-                if retriever:
-                    context_nodes = retriever.retrieve(f"pharmacovigilance {section.lower()} methods")
-                    context = "\n".join([node.text[:500] for node in context_nodes])
-                    full_prompt = f"{enhancement_prompt}\n\nRAG CONTEXT:\n{context}"
-                else:
-                    full_prompt = enhancement_prompt
-                    
-                # Generate enhanced content
-                enhanced_content = llm.complete(full_prompt).text
-                paper += f"## {section}\n\n{enhanced_content}\n\n"
-                print(f"✨ RAG-enhanced: {section}")
-                sections_used += 1
+        for section in sections:
+            if enhanced.get(section) is None:
+                print(f"⚠️ Keeping original text: {section}")
+                paper += f"## {section}\n\n{section_texts[section]}\n\n"
+                continue
+            paper += f"## {section}\n\n{enhanced[section]}\n\n"
+            sections_used += 1
 
         # 7. References
         paper += "## REFERENCES\n\n"
@@ -293,6 +499,61 @@ class PaperGenerator:
         print(f"📊 Summary: {sections_used} sections, {len(data_paths)} RAG PDFs")
         return paper
 
+    def get_llm(self):
+        """The process-wide pooled Ollama client for ``llm_model``"""
+        return get_llm(
+            self.config.get("llm_model", "llama3.2:1b"),
+            base_url=self.config.get("ollama_base_url", "http://localhost:11434"),
+            request_timeout=self.config.get("llm_request_timeout", 120.0),
+            keep_alive=self.config.get("llm_keep_alive", "30m"),
+            pool_connections=max(self.config.get("llm_pool_connections", 8),
+                                 self.config.get("llm_concurrency", 2)),
+        )
+
+    def response_cache(self):
+        """On-disk LLM response cache (None when ``llm_cache`` is off)"""
+        if not self.config.get("llm_cache", True):
+            return None
+        return get_response_cache(
+            self.get_cache_path() / "llm_responses.sqlite",
+            max_entries=self.config.get("llm_cache_max_entries", 5000),
+            ttl_seconds=self.config.get("llm_cache_ttl_hours", 168) * 3600,
+        )
+
+    def complete_with_retry(self, llm, prompt, label="", bypass_cache=False):
+        """Completion text (streamed, so TTFT/tokens/sec are recorded),
+        retried ``llm_retries`` times with backoff"""
+        retries = self.config.get("llm_retries", 2)
+        for attempt in range(retries + 1):
+            try:
+                return stream_text(llm, prompt, label=label or "llm",
+                                   cache=self.response_cache(), bypass=bypass_cache)
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                delay = self.config.get("llm_retry_backoff", 2.0) * 2 ** attempt
+                print(f"🔁 {label or 'LLM call'} failed ({e}), retry {attempt + 1}/{retries} in {delay:g}s")
+                time.sleep(delay)
+
+    def enhance_sections(self, llm, prompts, bypass_cache=False):
+        """``{section: text}`` for ``{section: prompt}``, at most
+        ``llm_concurrency`` sections in flight; a section that still fails
+        after its retries maps to None"""
+        workers = max(1, min(self.config.get("llm_concurrency", 2), len(prompts)))
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.complete_with_retry, llm, prompt, section, bypass_cache): section
+                       for section, prompt in prompts.items()}
+            for future in as_completed(futures):
+                section = futures[future]
+                try:
+                    results[section] = future.result()
+                    print(f"✨ RAG-enhanced: {section}")
+                except Exception as e:
+                    print(f"⚠️ Enhancement failed for {section}: {e}")
+                    results[section] = None
+        return {section: results[section] for section in prompts}
+
     def generate_references(self, terms):
         journals = self.config.get("journal_pool", ["Journal"])
         count = self.config.get("references", {}).get("count", 5)
@@ -312,13 +573,14 @@ class PaperGenerator:
         print("Type 'quit' to exit\n")
         
         # Internal paper context - FIXED f-string
-        terms, section_texts = self.extract_terms()
+        data_paths = self.load_data_pdfs()
+        terms, section_texts = self.extract_terms(data_paths)
         title = self.config['title_template'].format(terms=" / ".join(terms), title_suffix=self.config['title_suffix'])
         
         # Build sections summary WITHOUT backslash in f-string
         sections_summary = []
         for sec, content in section_texts.items():
-            cleaned = self.clean_text(content)[:800]
+            cleaned = content[:800]  # already cleaned at ingestion
             sections_summary.append(f"{sec}:\n{cleaned}...")
         sections_text = "\n".join(sections_summary)
         
@@ -327,11 +589,10 @@ class PaperGenerator:
         - Title: {title}
         - Terms: {terms}
         - Sections: {list(section_texts.keys())}
-        - RAG PDFs: {len(self.load_data_pdfs())}
+        - RAG PDFs: {len(data_paths)}
         """
         
         # Setup RAG
-        data_paths = self.load_data_pdfs()
         retriever, llm = self.setup_rag(data_paths)
         
         while True:
@@ -355,16 +616,19 @@ class PaperGenerator:
                 rag_context = "\n".join([f"RAG-{i+1}: {node.text[:300]}" for i, node in enumerate(rag_nodes)])
                 chat_prompt += f"\n\nEXTERNAL RAG CONTEXT:\n{rag_context}"
             
-            # Generate response
-            response = llm.complete(chat_prompt).text
-            print(f"\n🤖 AI REVIEWER:\n{response}\n")
+            # Stream response
+            print("\n🤖 AI REVIEWER:")
+            stats = {}
+            stream_text(llm, chat_prompt, on_token=print_token, label="chat", stats=stats,
+                        cache=self.response_cache())
+            print(f"\n⏱️ {format_call(stats)}\n")
         
         print("👋 Chat ended")
 
     def integrate_feedback(self, reviewer_comments):
         """5-STEP LOOP: Fix → Section → Suggest → Confirm → Repeat"""
-        data_paths = self.load_data_pdfs()
-        _, llm = self.setup_rag(data_paths)
+        # Suggestions need no retrieval: skip the index build
+        llm = self.get_llm()
         
         print(f"\n🔧 Processing: {reviewer_comments}")
         
@@ -389,13 +653,13 @@ class PaperGenerator:
             target_section = sections[int(section_num)-1]
             
             # 3. SUGGEST REFINEMENT
-            suggestion = llm.complete(f"""
+            print("\n3️⃣ SUGGESTION: ", end="")
+            suggestion = stream_text(llm, f"""
             Original fix: "{fix_input}"
             Paper section: {target_section}
             Suggest improved version for pharmacovigilance paper:
-            """).text.strip()
-            
-            print(f"\n3️⃣ SUGGESTION: {suggestion}")
+            """, on_token=print_token, label="feedback", cache=self.response_cache()).strip()
+            print()
             
             # 4. CONFIRM SUBSTITUTE
             final_fix = input(f"4️⃣ Use '{suggestion[:50]}...' ? (y/n/edit): ").strip().lower()
@@ -470,8 +734,11 @@ class PaperGenerator:
             pass
         return "# No paper - click Generate first!"
 
-    def chat_about_paper_question(self, question):
-        """Quick chat answer - FIXED VERSION"""
+    def chat_about_paper_question(self, question, on_token=None):
+        """Quick chat answer - FIXED VERSION
+
+        ``on_token(delta)`` receives the answer as it streams in.
+        """
         try:
             # 1. FORCE PAPER CONTEXT (no RAG dependency)
             terms, section_texts = self.extract_terms()
@@ -479,7 +746,7 @@ class PaperGenerator:
             
             # Build context from ALL available sections
             for section, content in section_texts.items():
-                paper_context += f"\n## {section}\n{self.clean_text(content)[:800]}...\n"
+                paper_context += f"\n## {section}\n{content[:800]}...\n"
             
             # Add paper metadata
             paper_context = f"""
@@ -491,9 +758,8 @@ class PaperGenerator:
             JOURNAL TARGET: Drug Safety
             """
             
-            # 2. Setup LLM with paper context
-            data_paths = self.load_data_pdfs()
-            _, llm = self.setup_rag(data_paths)
+            # 2. Shared LLM (paper-only answer: no retrieval, no index build)
+            llm = self.get_llm()
             
             # 3. EXPLICIT PAPER-ONLY PROMPT
             prompt = f"""
@@ -508,7 +774,8 @@ class PaperGenerator:
             If no info found: "Not covered in this paper"
             """
             
-            response = llm.complete(prompt).text.strip()
+            response = stream_text(llm, prompt, on_token=on_token, label="paper_question",
+                                   cache=self.response_cache()).strip()
             return response if response else "No paper content available"
             
         except Exception as e:
@@ -0,0 +1,180 @@
+"""Content-addressed cache of per-page PDF text.
+
+Every loader (sections, data PDFs, template, RAG documents) asks this cache
+for page text instead of opening the PDF with pdfplumber. Entries are keyed
+by the file's SHA-256 plus the extractor version, so renamed/moved files
+still hit and a changed extractor never serves stale text.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pdfplumber
+
+from cache_utils import HitStats, file_sha256, read_json, write_json_atomic
+
+# Bump when extraction output changes (new backend, different options...)
+EXTRACTOR_VERSION = 1
+EXTRACTOR_ID = f"pdfplumber-{pdfplumber.__version__}-v{EXTRACTOR_VERSION}"
+
+
+def iter_page_range(pdf_path, start=0, stop=None):
+    """Yield raw text of pages [start, stop) one at a time (the one place
+    pdfplumber is called). Each page's layout objects are released as soon
+    as its text is out, so memory does not grow with document length."""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            yield page.extract_text() or ""
+            page.close()
+
+
+def extract_page_range(pdf_path, start=0, stop=None):
+    return list(iter_page_range(pdf_path, start, stop))
+
+
+def count_pdf_pages(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages(pdf_path):
+    return extract_page_range(pdf_path)
+
+
+class ParallelExtractor:
+    """Spreads page ranges of many PDFs over a ProcessPoolExecutor.
+
+    pdfplumber is pure Python and CPU-bound, so threads do not help; each
+    task opens the PDF in a worker process and extracts ``pages_per_task``
+    consecutive pages. Results are reassembled in page order.
+    """
+
+    def __init__(self, workers=None, pages_per_task=8):
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = max(1, pages_per_task)
+
+    def extract_many(self, pdf_paths):
+        """Return ``{pdf_path: pages}``; files that fail are left out"""
+        return dict(self.iter_extract(pdf_paths))
+
+    def iter_extract(self, pdf_paths):
+        """Yield ``(pdf_path, pages)`` file by file, in input order"""
+        pdf_paths = list(pdf_paths)
+        if self.workers <= 1 or not pdf_paths:
+            yield from self._extract_serial(pdf_paths)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            counts = {}
+            for pdf_path, future in [(p, pool.submit(count_pdf_pages, p)) for p in pdf_paths]:
+                try:
+                    counts[pdf_path] = future.result()
+                except Exception as e:
+                    print(f"⚠️ Cannot open {Path(pdf_path).name}: {e}")
+
+            tasks = {
+                pdf_path: [
+                    pool.submit(extract_page_range, pdf_path, start, start + self.pages_per_task)
+                    for start in range(0, n_pages, self.pages_per_task)
+                ]
+                for pdf_path, n_pages in counts.items()
+            }
+            for pdf_path, futures in tasks.items():
+                try:
+                    pages = [text for f in futures for text in f.result()]
+                except Exception as e:
+                    print(f"⚠️ Extraction failed for {Path(pdf_path).name}: {e}")
+                    continue
+                yield pdf_path, pages
+
+    def _extract_serial(self, pdf_paths):
+        for pdf_path in pdf_paths:
+            try:
+                yield pdf_path, extract_pdf_pages(pdf_path)
+            except Exception as e:
+                print(f"⚠️ Extraction failed for {Path(pdf_path).name}: {e}")
+
+
+class PdfPageCache(HitStats):
+    def __init__(self, cache_dir, workers=None, pages_per_task=8, keep_in_memory=True):
+        super().__init__()
+        self.cache_dir = Path(cache_dir)
+        self.extractor = ParallelExtractor(workers, pages_per_task)
+        # False = streaming mode: pages are only ever held one file at a time
+        self.keep_in_memory = keep_in_memory
+        self._memory = {}
+
+    def _entry_path(self, sha):
+        return self.cache_dir / f"{sha}.{EXTRACTOR_ID}.json"
+
+    def get_pages(self, pdf_path):
+        """Per-page raw text for ``pdf_path``, parsing the PDF only on a miss"""
+        sha = file_sha256(pdf_path)
+        pages = self._lookup(sha)
+        if pages is None:
+            self.misses += 1
+            pages = extract_pdf_pages(pdf_path)
+            self._store(sha, pdf_path, pages)
+        else:
+            self.hits += 1
+        return pages
+
+    def contains(self, pdf_path):
+        return self._cached(file_sha256(pdf_path))
+
+    def _cached(self, sha):
+        # Entry names carry EXTRACTOR_ID: existence is enough, no JSON parse
+        return sha in self._memory or self._entry_path(sha).exists()
+
+    def iter_pages(self, pdf_path):
+        """Yield per-page raw text lazily; a miss streams straight from the PDF"""
+        sha = file_sha256(pdf_path)
+        pages = self._lookup(sha)
+        if pages is not None:
+            self.hits += 1
+            yield from pages
+            return
+
+        self.misses += 1
+        pages = []
+        for text in iter_page_range(pdf_path):
+            pages.append(text)
+            yield text
+        self._store(sha, pdf_path, pages)
+
+    def prefetch(self, pdf_paths):
+        """Extract every uncached file in one parallel batch"""
+        missing, seen = {}, set()
+        for pdf_path in pdf_paths:
+            sha = file_sha256(pdf_path)
+            if sha in seen:
+                continue  # duplicate content: extracted once
+            seen.add(sha)
+            if not self._cached(sha):
+                missing[pdf_path] = sha
+        if not missing:
+            return
+
+        print(f"📑 Extracting {len(missing)} PDFs with {self.extractor.workers} workers")
+        for pdf_path, pages in self.extractor.iter_extract(missing):
+            self.misses += 1
+            self._store(missing[pdf_path], pdf_path, pages)
+
+    def _lookup(self, sha):
+        if sha in self._memory:
+            return self._memory[sha]
+        entry = read_json(self._entry_path(sha))
+        if entry and entry.get("extractor") == EXTRACTOR_ID:
+            if self.keep_in_memory:
+                self._memory[sha] = entry["pages"]
+            return entry["pages"]
+        return None
+
+    def _store(self, sha, pdf_path, pages):
+        write_json_atomic(self._entry_path(sha), {
+            "extractor": EXTRACTOR_ID,
+            "source": Path(pdf_path).name,
+            "pages": pages,
+        })
+        if self.keep_in_memory:
+            self._memory[sha] = pages
@@ -0,0 +1,290 @@
+"""Persistent VectorStoreIndex for docs/data.
+
+The index (vectors + docstore) is persisted next to a manifest describing
+what it was built from. ``load_or_build_index`` reloads it when the manifest
+still matches. When only some PDFs changed it syncs incrementally: pages of
+modified/deleted files are removed, new/modified files are extracted,
+chunked and embedded, and everything else is left untouched. An optional
+BM25 index (``lexical.BM25Index``) receives the same chunks and deletions.
+It is validated by its own signature (``bm25_settings`` + file hashes):
+when only BM25 is stale it is re-chunked on its own and the vectors stay.
+"""
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from llama_index.core import (
+    VectorStoreIndex,
+    Settings,
+    StorageContext,
+    load_index_from_storage,
+)
+from llama_index.core.ingestion import run_transformations
+
+from embeddings import embed_nodes_by_length
+from cache_utils import content_version, file_sha256, read_json, write_json_atomic
+from pdf_cache import EXTRACTOR_ID
+from vector_stores import index_signature, open_vector_store
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 3
+INSERT_BATCH_DOCS = 128
+
+# One writer at a time (e.g. the web app's corpus watcher vs a request)
+_index_lock = threading.RLock()
+# persist dir -> content version of the index last loaded/built there
+_versions = {}
+
+
+def scan_files(data_paths, known_files=None):
+    """name -> {sha256, size, mtime_ns}; only re-hashes files whose stat moved.
+    Files gone since ``data_paths`` was listed are left out (= removed)."""
+    known_files = known_files or {}
+    files = {}
+    for pdf_path in sorted(data_paths):
+        name = Path(pdf_path).name
+        try:
+            stat = os.stat(pdf_path)
+            known = known_files.get(name, {})
+            if known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns:
+                sha = known["sha256"]
+            else:
+                sha = file_sha256(pdf_path)
+        except FileNotFoundError:
+            continue
+        files[name] = {"sha256": sha, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return files
+
+
+def chunk_id(i, document):
+    """Deterministic chunk (node) id: a UUID, as Qdrant point ids must be,
+    derived from the page document id, so re-ingesting a page upserts"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{document.doc_id}#{i}"))
+
+
+def index_settings(chunk_size, chunk_overlap, embed_model_name, vector_store="simple",
+                   vector_store_options=None):
+    """Settings that, if changed, invalidate every stored vector"""
+    return {
+        "vector_store": index_signature(vector_store, vector_store_options),
+        "version": MANIFEST_VERSION,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embed_model": embed_model_name,
+        "extractor": EXTRACTOR_ID,
+    }
+
+
+def bm25_settings(chunk_size, chunk_overlap):
+    """Settings that, if changed, invalidate every BM25 chunk (no embed model)"""
+    return {
+        "version": MANIFEST_VERSION,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "extractor": EXTRACTOR_ID,
+    }
+
+
+def _bm25_signature(chunk_size, chunk_overlap, files):
+    return {**bm25_settings(chunk_size, chunk_overlap), "files": _file_hashes(files)}
+
+
+def _bm25_matches(bm25_index, signature):
+    known = bm25_index.get_meta("index") or {}
+    return {k: v for k, v in known.items() if k != "stats"} == signature
+
+
+def _file_hashes(files):
+    return {name: f["sha256"] for name, f in files.items()}
+
+
+def _set_version(persist_dir, settings, files):
+    _versions[str(Path(persist_dir).resolve())] = content_version({**settings, "files": _file_hashes(files)})
+
+
+def index_version(persist_dir):
+    """Version of the index this process last loaded/synced at ``persist_dir``
+    (changes whenever its settings or any source file change), else None"""
+    return _versions.get(str(Path(persist_dir).resolve()))
+
+
+def _insert_batch(index, documents, bucket_by_length, bm25_index):
+    nodes = run_transformations(documents, Settings.transformations)
+    if bm25_index is not None:
+        bm25_index.add_nodes(nodes)
+    if bucket_by_length:
+        # Pre-embed sorted by length; insert_nodes skips embedded nodes
+        embed_nodes_by_length(nodes, Settings.embed_model)
+    index.insert_nodes(nodes)
+    for doc in documents:
+        index.docstore.set_document_hash(doc.id_, doc.hash)
+
+
+def _insert_documents(index, documents, bucket_by_length=True, bm25_index=None):
+    """Chunk + embed a document stream in small batches (bounded memory).
+
+    Returns the inserted doc ids grouped by source file name.
+    """
+    doc_ids, batch = {}, []
+    for doc in documents:
+        doc_ids.setdefault(doc.metadata["file_name"], []).append(doc.doc_id)
+        batch.append(doc)
+        if len(batch) >= INSERT_BATCH_DOCS:
+            _insert_batch(index, batch, bucket_by_length, bm25_index)
+            batch = []
+    if batch:
+        _insert_batch(index, batch, bucket_by_length, bm25_index)
+    return doc_ids
+
+
+def _persist(index, persist_dir, settings, files, bm25_index):
+    persist_dir.mkdir(parents=True, exist_ok=True)
+    index.storage_context.persist(persist_dir=str(persist_dir))
+    if bm25_index is not None:
+        bm25_index.flush()
+        bm25_index.set_meta("index", {
+            **_bm25_signature(settings["chunk_size"], settings["chunk_overlap"], files),
+            "stats": files,
+        })
+    # Manifest last: an interrupted persist is simply rebuilt next time
+    write_json_atomic(persist_dir / MANIFEST_NAME, {**settings, "files": files})
+    _set_version(persist_dir, settings, files)
+
+
+def _sync_index(index, known_files, files, paths_by_name, load_documents, bucket_by_length,
+                bm25_index):
+    """Apply file additions/changes/deletions to a loaded index in place"""
+    changed = [name for name in files
+               if known_files.get(name, {}).get("sha256") != files[name]["sha256"]]
+    removed = [name for name in known_files if name not in files]
+
+    for name in changed + removed:
+        for doc_id in known_files.get(name, {}).get("doc_ids", []):
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+            if bm25_index is not None:
+                bm25_index.delete_ref_doc(doc_id)
+
+    doc_ids = _insert_documents(
+        index, load_documents([paths_by_name[name] for name in changed]), bucket_by_length, bm25_index
+    )
+    for name in files:
+        files[name]["doc_ids"] = (doc_ids.get(name, []) if name in changed
+                                  else known_files[name].get("doc_ids", []))
+    print(f"🔄 RAG index synced: {len(changed)} new/modified, {len(removed)} removed PDFs")
+
+
+def load_or_build_index(data_paths, persist_dir, chunk_size, chunk_overlap,
+                        embed_model_name, load_documents, incremental=True,
+                        bucket_by_length=True, vector_store="simple",
+                        vector_store_options=None, bm25_index=None):
+    """Reload the persisted index, syncing or rebuilding it if stale.
+
+    ``load_documents(paths)`` must return/yield llama_index Documents with a stable
+    ``doc_id`` and a ``file_name`` metadata entry; it is only called for the
+    files that actually need (re-)embedding.
+    ``Settings`` (embed model, chunking) must already be configured.
+    ``vector_store`` / ``vector_store_options`` select and tune the backend
+    (see ``vector_stores.open_vector_store``). ``bm25_index`` is kept in step
+    with the vector index; if it does not match it is rebuilt on its own
+    (``load_or_build_bm25``), never forcing a re-embed.
+    """
+    with _index_lock:
+        index = _load_or_build_vectors(
+            data_paths, Path(persist_dir), chunk_size, chunk_overlap, embed_model_name, load_documents,
+            incremental, bucket_by_length, vector_store, vector_store_options, bm25_index,
+        )
+        if bm25_index is not None:
+            load_or_build_bm25(data_paths, bm25_index, chunk_size, chunk_overlap, load_documents)
+        return index
+
+
+def _load_or_build_vectors(data_paths, persist_dir, chunk_size, chunk_overlap, embed_model_name,
+                           load_documents, incremental, bucket_by_length, vector_store,
+                           vector_store_options, bm25_index):
+    paths_by_name = {Path(p).name: str(p) for p in data_paths}
+    settings = index_settings(chunk_size, chunk_overlap, embed_model_name,
+                              vector_store, vector_store_options)
+    vector_store_options = vector_store_options or {}
+
+    manifest = read_json(persist_dir / MANIFEST_NAME) or {}
+    known_files = manifest.pop("files", {})
+    if manifest != settings:
+        known_files = {}
+    files = scan_files(data_paths, known_files)
+    # A sync only patches BM25 if it matched the old files; a stale BM25
+    # is rebuilt from scratch by load_or_build_bm25 instead
+    sync_bm25 = bm25_index
+    if bm25_index is not None and \
+            not _bm25_matches(bm25_index, _bm25_signature(chunk_size, chunk_overlap, known_files)):
+        sync_bm25 = None
+    up_to_date = {n: f["sha256"] for n, f in files.items()} == \
+        {n: f["sha256"] for n, f in known_files.items()}
+
+    if known_files and (up_to_date or incremental):
+        try:
+            storage_context = StorageContext.from_defaults(
+                persist_dir=str(persist_dir),
+                vector_store=open_vector_store(vector_store, persist_dir, **vector_store_options),
+            )
+            index = load_index_from_storage(storage_context)
+            if up_to_date:
+                stats_moved = any(
+                    (f["size"], f["mtime_ns"]) != (known_files[n].get("size"), known_files[n].get("mtime_ns"))
+                    for n, f in files.items()
+                )
+                if stats_moved:
+                    # Touched but identical files: refresh stats, keep vectors
+                    for name in files:
+                        files[name]["doc_ids"] = known_files[name].get("doc_ids", [])
+                    write_json_atomic(persist_dir / MANIFEST_NAME, {**settings, "files": files})
+                _set_version(persist_dir, settings, files)
+                print(f"💾 RAG index loaded from {persist_dir}")
+                return index
+            _sync_index(index, known_files, files, paths_by_name, load_documents,
+                        bucket_by_length, sync_bm25)
+            _persist(index, persist_dir, settings, files, sync_bm25)
+            return index
+        except Exception as e:
+            print(f"⚠️ Stored index unusable, rebuilding: {e}")
+
+    print(f"🔨 Building RAG index for {len(data_paths)} data PDFs")
+    storage_context = StorageContext.from_defaults(
+        vector_store=open_vector_store(vector_store, persist_dir, fresh=True, **vector_store_options)
+    )
+    index = VectorStoreIndex([], storage_context=storage_context)
+    if bm25_index is not None:
+        bm25_index.clear()
+    doc_ids = _insert_documents(
+        index, load_documents(list(paths_by_name.values())), bucket_by_length, bm25_index
+    )
+    for name in files:
+        files[name]["doc_ids"] = doc_ids.get(name, [])
+    _persist(index, persist_dir, settings, files, bm25_index)
+    return index
+
+
+def load_or_build_bm25(data_paths, bm25_index, chunk_size, chunk_overlap, load_documents):
+    """BM25-only index (no embeddings needed), rebuilt whenever the files,
+    chunking or extractor change. ``Settings`` chunking must be configured.
+    """
+    with _index_lock:
+        known = bm25_index.get_meta("index") or {}
+        files = scan_files(data_paths, known.get("stats", {}))
+        signature = _bm25_signature(chunk_size, chunk_overlap, files)
+        if _bm25_matches(bm25_index, signature):
+            return bm25_index
+
+        print(f"🔤 Building BM25 index for {len(data_paths)} data PDFs")
+        bm25_index.clear()
+        batch = []
+        for doc in load_documents(list(data_paths)):
+            batch.append(doc)
+            if len(batch) >= INSERT_BATCH_DOCS:
+                bm25_index.add_nodes(run_transformations(batch, Settings.transformations))
+                batch = []
+        if batch:
+            bm25_index.add_nodes(run_transformations(batch, Settings.transformations))
+        bm25_index.flush()
+        bm25_index.set_meta("index", {**signature, "stats": files})
+        return bm25_index
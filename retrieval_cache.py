@@ -0,0 +1,127 @@
+"""Process-wide LRU cache of retrieval results.
+
+``generate_paper`` asks the same fixed section queries on every
+regeneration and chat users repeat questions across sessions.
+``CachedRetriever`` wraps any retriever and answers a repeated
+(index version, normalized query, top_k) from memory. The index version is
+a hash of the index settings + source file hashes, so any corpus or config
+change makes older entries unreachable (they are dropped on the next
+lookup). On a miss the query embedding comes from an exact-match
+``QueryEmbeddingCache`` when one is given. ``retrieve_batch`` answers many
+queries at once: the misses are embedded in one pass and searched together.
+"""
+import threading
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import QueryBundle
+
+from cache_utils import LRUCache
+from vector_stores import retrieve_batch
+
+_caches = {}
+_lock = threading.Lock()
+
+
+def normalize_query(text):
+    """Case- and whitespace-insensitive cache key for a query"""
+    return " ".join(text.lower().split())
+
+
+class RetrievalCache(LRUCache):
+    """LRU map (version, scope, normalized query, top_k) -> [NodeWithScore]"""
+
+    def __init__(self, max_entries=256):
+        super().__init__(max_entries)
+        self._versions = {}
+
+    def get(self, key, default=None):
+        hits = super().get(key)
+        return default if hits is None else list(hits)
+
+    def put(self, key, hits):
+        super().put(key, list(hits))
+
+    def check_version(self, scope, version):
+        """Drop ``scope``'s entries built against another index version"""
+        with self._lock:
+            changed = self._versions.get(scope, version) != version
+            self._versions[scope] = version
+        if changed:
+            self.discard_if(lambda key: key[1] == scope and key[0] != version)
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self._versions.clear()
+
+
+def get_retrieval_cache(max_entries=256):
+    """The process-wide RetrievalCache (size cap follows the latest caller)"""
+    with _lock:
+        if "default" not in _caches:
+            _caches["default"] = RetrievalCache(max_entries)
+        cache = _caches["default"]
+        cache.max_entries = max_entries
+        return cache
+
+
+class CachedRetriever(BaseRetriever):
+    """``retriever`` behind a RetrievalCache.
+
+    ``version()`` returns the current index version; ``scope`` tells apart
+    retrievers sharing the cache (retrieval mode, source filters).
+    ``query_embeddings`` (a ``QueryEmbeddingCache``) + ``embed_model`` let
+    dense retrievers skip the model for repeated query strings.
+    """
+
+    def __init__(self, retriever, cache, version, scope=(), top_k=2,
+                 query_embeddings=None, embed_model=None):
+        super().__init__()
+        self.retriever = retriever
+        self.cache = cache
+        self.version = version
+        self.scope = scope
+        self.top_k = top_k
+        self.query_embeddings = query_embeddings
+        self.embed_model = embed_model
+
+    def _retrieve(self, query_bundle):
+        version = self.version()
+        key = (version, self.scope, normalize_query(query_bundle.query_str), self.top_k)
+        if version is not None:
+            self.cache.check_version(self.scope, version)
+            hits = self.cache.get(key)
+            if hits is not None:
+                return hits
+        if self.query_embeddings is not None and query_bundle.embedding is None:
+            query_bundle.embedding = self.query_embeddings.get_query_embedding(
+                self.embed_model, query_bundle.query_str
+            )
+        hits = self.retriever.retrieve(query_bundle)
+        if version is not None:
+            self.cache.put(key, hits)
+        return hits
+
+    def retrieve_batch(self, queries):
+        """Hits for each query (str or QueryBundle), in order"""
+        bundles = [QueryBundle(query) if isinstance(query, str) else query for query in queries]
+        version = self.version()
+        keys = [(version, self.scope, normalize_query(bundle.query_str), self.top_k) for bundle in bundles]
+        results = [None] * len(bundles)
+        if version is not None:
+            self.cache.check_version(self.scope, version)
+            results = [self.cache.get(key) for key in keys]
+        missing = [i for i, hits in enumerate(results) if hits is None]
+        if missing:
+            if self.query_embeddings is not None:
+                unembedded = [i for i in missing if bundles[i].embedding is None]
+                embeddings = self.query_embeddings.get_query_embeddings(
+                    self.embed_model, [bundles[i].query_str for i in unembedded]
+                )
+                for i, embedding in zip(unembedded, embeddings):
+                    bundles[i].embedding = embedding
+            for i, hits in zip(missing, retrieve_batch(self.retriever, [bundles[i] for i in missing])):
+                results[i] = hits
+                if version is not None:
+                    self.cache.put(keys[i], hits)
+        return results
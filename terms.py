@@ -0,0 +1,380 @@
+"""Title/index-term extraction over a stream of cleaned text.
+
+``TermCollector`` applies the ``perfect_term_filter`` rules page by page
+instead of over one concatenated corpus string. Only the distinct candidate
+terms are kept, and feeding stops as soon as the result can no longer
+change, so memory does not grow with corpus size.
+
+``PhraseFilter`` decides whether a candidate phrase is acceptable
+(length, ``bad_terms``, ``skip_words``, ``require_vowels``) in one scan of
+the phrase, using an Aho-Corasick automaton built once per config load
+instead of one substring search per bad term. Verdicts are memoized in a
+bounded LRU; streaming paths can skip the memo entirely.
+
+``TermIndex`` keeps per-document candidate-phrase counts for the whole
+corpus, persisted on disk and updated one document at a time, and ranks
+candidates in bulk with TF-IDF over a sparse document x phrase matrix.
+
+``SpaceSaving`` is the bounded-memory alternative for corpora too large
+for exact counts: a fixed number of counters, one pass over the stream,
+and a per-term overestimation bound.
+"""
+import hashlib
+import json
+import re
+from collections import Counter, deque
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from cache_utils import LRUCache, read_json, write_json_atomic
+from normalizer import NORMALIZER_VERSION
+from pdf_cache import EXTRACTOR_ID
+
+TERM_PATTERNS = [
+    re.compile(r'\b[A-Z][a-z]{4,}(?:\s+[A-Z][a-z]{4,}){0,2}\b', re.IGNORECASE),
+    re.compile(r'\bPharmaco[A-Za-z]+\b', re.IGNORECASE),
+    re.compile(r'\bRisk\s*[A-Za-z]+\b', re.IGNORECASE),
+]
+
+
+# Bump when TERM_PATTERNS or candidate counting changes
+TERM_INDEX_VERSION = 1
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: one pass over the text, whatever the
+    number of patterns. ``patterns`` is an iterable of (string, payload)."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern, payload in patterns:
+            state = 0
+            for ch in pattern:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.out[state].append((len(pattern), payload))
+
+        # Breadth-first fail links; outputs of the fail state are inherited
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def step(self, state, ch):
+        while state and ch not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(ch, 0)
+
+    def iter_matches(self, text):
+        """Yield (end_index, pattern_length, payload) for every occurrence"""
+        state = 0
+        for i, ch in enumerate(text):
+            state = self.step(state, ch)
+            for length, payload in self.out[state]:
+                yield i, length, payload
+
+
+class PhraseFilter:
+    VOWELS = frozenset("aeiouy")
+
+    def __init__(self, bad_terms=(), skip_words=(), min_phrase_length=12, require_vowels=False,
+                 memo_entries=65536):
+        self.min_phrase_length = min_phrase_length
+        self.require_vowels = require_vowels
+        # bad_terms reject on any substring hit, skip_words on whole-word hits
+        self.automaton = AhoCorasick(
+            [(term.lower(), "bad") for term in bad_terms if term] +
+            [(word.lower(), "skip") for word in skip_words if word]
+        )
+        self._verdicts = LRUCache(memo_entries)  # 0 = no memo
+        self.signature = hashlib.sha256(json.dumps([
+            sorted(bad_terms), sorted(skip_words), min_phrase_length, require_vowels,
+        ]).encode("utf-8")).hexdigest()
+
+    def accepts(self, phrase_lower):
+        """Memoized ``check``: repeated phrases skip the scan"""
+        verdict = self._verdicts.get(phrase_lower)
+        if verdict is None:
+            verdict = self.check(phrase_lower)
+            self._verdicts.put(phrase_lower, verdict)
+        return verdict
+
+    def check(self, phrase_lower):
+        """Verdict without touching the memo"""
+        return len(phrase_lower) >= self.min_phrase_length and self._scan(phrase_lower)
+
+    def _scan(self, text):
+        automaton = self.automaton
+        state = 0
+        word_len = 0
+        word_has_vowel = False
+        for i, ch in enumerate(text):
+            state = automaton.step(state, ch)
+            for length, kind in automaton.out[state]:
+                if kind == "bad":
+                    return False
+                start = i - length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (i + 1 == len(text) or not text[i + 1].isalnum()):
+                    return False
+
+            if ch.isalpha():
+                word_len += 1
+                word_has_vowel = word_has_vowel or ch in self.VOWELS
+            else:
+                if self.require_vowels and word_len and not word_has_vowel:
+                    return False
+                word_len, word_has_vowel = 0, False
+        return not (self.require_vowels and word_len and not word_has_vowel)
+
+
+def iter_candidates(texts, phrase_filter, memo=True):
+    """Every accepted candidate phrase (title-cased) in ``texts``, in order.
+
+    ``memo=False`` checks each phrase without the filter's memo, for
+    fixed-budget streaming where only the counters may hold phrases.
+    """
+    accepts = phrase_filter.accepts if memo else phrase_filter.check
+    for text in texts:
+        for pattern in TERM_PATTERNS:
+            for phrase in pattern.findall(text):
+                if accepts(phrase.lower()):
+                    yield phrase.title()
+
+
+class TermCollector:
+    def __init__(self, phrase_filter=None, limit=3):
+        self.phrase_filter = phrase_filter or PhraseFilter()
+        self.limit = limit
+        # One ordered set per pattern: results list pattern 1 hits first
+        self.found = [{} for _ in TERM_PATTERNS]
+
+    @property
+    def done(self):
+        """Pattern 1 alone already fills the result: later text cannot change it"""
+        return len(self.found[0]) >= self.limit
+
+    def feed(self, text):
+        for pattern, found in zip(TERM_PATTERNS, self.found):
+            if self.done:
+                return
+            for phrase in pattern.findall(text):
+                if self.phrase_filter.accepts(phrase.lower()):
+                    found.setdefault(phrase.title())
+
+    def feed_stream(self, texts):
+        """Consume ``texts`` lazily, stopping early once ``done``"""
+        for text in texts:
+            self.feed(text)
+            if self.done:
+                break
+        return self
+
+    def terms(self):
+        merged = dict.fromkeys(term for found in self.found for term in found)
+        return list(merged)[:self.limit]
+
+
+class TermIndex:
+    """Persisted corpus statistics for title/index-term ranking.
+
+    ``docs`` maps a document key (content SHA-256) to its candidate-phrase
+    counts, stored against integer columns of ``vocab``. Adding a document
+    only counts that document; ranking is a lookup in cached scores.
+    """
+
+    def __init__(self, path, phrase_filter):
+        self.path = Path(path)
+        self.phrase_filter = phrase_filter
+        # Documents are keyed by file hash: the counts also depend on how
+        # the text was extracted and cleaned
+        self.signature = (f"v{TERM_INDEX_VERSION}:{EXTRACTOR_ID}:normalizer-v{NORMALIZER_VERSION}:"
+                          f"{phrase_filter.signature}")
+        self.vocab = []
+        self._columns = {}
+        self.docs = {}
+        self._dirty = False
+        self._ranking = None
+        self._load()
+
+    def _load(self):
+        data = read_json(self.path)
+        if not data or data.get("signature") != self.signature:
+            return
+        self.vocab = data["vocab"]
+        self._columns = {phrase: col for col, phrase in enumerate(self.vocab)}
+        self.docs = {
+            key: {"name": doc["name"], "counts": {int(col): n for col, n in doc["counts"].items()}}
+            for key, doc in data["docs"].items()
+        }
+
+    def save(self):
+        if not self._dirty:
+            return
+        write_json_atomic(self.path, {
+            "signature": self.signature,
+            "vocab": self.vocab,
+            "docs": self.docs,
+        })
+        self._dirty = False
+
+    def _column(self, phrase):
+        if phrase not in self._columns:
+            self._columns[phrase] = len(self.vocab)
+            self.vocab.append(phrase)
+        return self._columns[phrase]
+
+    def count_candidates(self, texts):
+        return Counter(iter_candidates(texts, self.phrase_filter))
+
+    def add_document(self, key, name, texts):
+        counts = self.count_candidates(texts)
+        self.docs[key] = {"name": name, "counts": {self._column(p): n for p, n in counts.items()}}
+        self._dirty = True
+        self._ranking = None
+
+    def remove_document(self, key):
+        if self.docs.pop(key, None) is not None:
+            self._dirty = True
+            self._ranking = None
+
+    def _compact(self):
+        """Drop phrases no remaining document uses"""
+        used = sorted({col for doc in self.docs.values() for col in doc["counts"]})
+        if len(used) == len(self.vocab):
+            return
+        remap = {old: new for new, old in enumerate(used)}
+        self.vocab = [self.vocab[col] for col in used]
+        self._columns = {phrase: col for col, phrase in enumerate(self.vocab)}
+        for doc in self.docs.values():
+            doc["counts"] = {remap[col]: n for col, n in doc["counts"].items()}
+
+    def sync(self, corpus_docs):
+        """Index new documents, forget ones no longer in ``corpus_docs``"""
+        keys = {doc.sha256 for doc in corpus_docs}
+        stale = [key for key in self.docs if key not in keys]
+        for key in stale:
+            self.remove_document(key)
+        if stale:
+            self._compact()
+        for doc in corpus_docs:
+            if doc.sha256 not in self.docs:
+                self.add_document(doc.sha256, doc.name, doc.iter_clean_pages())
+        self.save()
+
+    def matrix(self):
+        """Sparse documents x phrases count matrix (rows in ``docs`` order)"""
+        rows, cols, counts = [], [], []
+        for row, doc in enumerate(self.docs.values()):
+            rows += [row] * len(doc["counts"])
+            cols += doc["counts"].keys()
+            counts += doc["counts"].values()
+        return sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), (rows, cols)),
+            shape=(len(self.docs), len(self.vocab)),
+        )
+
+    def scores(self):
+        """Corpus TF-IDF per phrase: sum over docs of (1 + log tf) * idf"""
+        counts = self.matrix()
+        n_docs = counts.shape[0]
+        doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+        idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1.0
+        counts.data = 1.0 + np.log(counts.data)
+        return np.asarray(counts.sum(axis=0)).ravel() * idf
+
+    def top_terms(self, k=3):
+        if self._ranking is None:
+            scores = self.scores()
+            # Ties broken alphabetically so the order never depends on file order
+            alphabetical = np.argsort(np.array(self.vocab, dtype=object), kind="stable")
+            order = alphabetical[np.argsort(-scores[alphabetical], kind="stable")]
+            self._ranking = [self.vocab[col] for col in order if scores[col] > 0]
+        return self._ranking[:k]
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter counter (Metwally et al.) with ``capacity``
+    counters in a stream-summary layout, so every update is O(1).
+
+    Each tracked item's count overestimates its true count by at most its
+    ``error`` (itself at most ``total / capacity``); any item whose true
+    count exceeds ``total / capacity`` is guaranteed to be tracked.
+    """
+
+    # Rough CPython cost of one tracked phrase (str + dict/set entries)
+    BYTES_PER_COUNTER = 320
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.counts = {}  # item -> count
+        self.errors = {}  # item -> overestimation bound
+        self._buckets = {}  # count -> set of items
+        self._min_count = 0
+        self.total = 0
+
+    @classmethod
+    def from_memory_mb(cls, memory_mb):
+        return cls(memory_mb * 2**20 // cls.BYTES_PER_COUNTER)
+
+    def _move(self, item, old, new):
+        bucket = self._buckets[old]
+        bucket.discard(item)
+        if not bucket:
+            del self._buckets[old]
+            if old == self._min_count:
+                self._min_count = new
+        self._buckets.setdefault(new, set()).add(item)
+        self.counts[item] = new
+
+    def add(self, item):
+        self.total += 1
+        count = self.counts.get(item)
+        if count is not None:
+            self._move(item, count, count + 1)
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+            self._buckets.setdefault(1, set()).add(item)
+            self._min_count = 1
+        else:
+            # Evict one of the least-counted items and inherit its count
+            victim = next(iter(self._buckets[self._min_count]))
+            self.errors[item] = self._min_count
+            del self.errors[victim]
+            count = self.counts.pop(victim)
+            self.counts[item] = count
+            self._buckets[count].discard(victim)
+            self._buckets[count].add(item)
+            self._move(item, count, count + 1)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+        return self
+
+    @property
+    def error_bound(self):
+        return self.total / self.capacity
+
+    def top(self, k):
+        """[(item, estimated_count, error)] by estimate, ties alphabetical"""
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+        return [(item, count, self.errors[item]) for item, count in ranked]
+
+    def top_terms(self, k=3):
+        return [item for item, _, _ in self.top(k)]
@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llama_index.core.schema import TextNode  # noqa: E402
+
+
+@pytest.fixture
+def make_nodes():
+    """``make_nodes(count, dim=16, seed=0)``: embedded chunk nodes n0..n{count-1}
+    from publication.pdf, spread over pages 1-7"""
+    def make(count, dim=16, seed=0):
+        vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+        return [
+            TextNode(id_=f"n{i}", text=f"chunk {i}", embedding=vector.tolist(),
+                     metadata={"file_name": "publication.pdf", "page_label": str(i % 7 + 1)})
+            for i, vector in enumerate(vectors)
+        ]
+    return make
@@ -0,0 +1,69 @@
+import pytest
+
+import llm_client
+from llm_client import SQLiteResponseCache, get_llm, stream_text
+from ollama_stub import start_stub_server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable stand-in for ``time.time`` inside llm_client"""
+    now = [1000.0]
+    monkeypatch.setattr(llm_client.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = SQLiteResponseCache(tmp_path / "responses.sqlite", ttl_seconds=60)
+    cache.put("default", "a")
+    cache.put("short", "b", ttl_seconds=5)
+    cache.put("forever", "c", ttl_seconds=0)
+
+    clock[0] += 30
+    assert (cache.get("default"), cache.get("short"), cache.get("forever")) == ("a", None, "c")
+
+    clock[0] += 10_000
+    assert (cache.get("default"), cache.get("forever")) == (None, "c")
+    assert cache.count == 1
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path, clock):
+    cache = SQLiteResponseCache(tmp_path / "responses.sqlite", max_entries=2)
+    cache.put("a", "1")
+    clock[0] += 1
+    cache.put("b", "2")
+    clock[0] += 1
+    cache.get("a")
+    clock[0] += 1
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 1, "hit_rate": 0.75}
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    server = start_stub_server(ttft=0, token_latency=0, tokens=8)
+    yield server
+    server.shutdown()
+
+
+def test_bypass_regenerates_and_refreshes_the_entry(tmp_path, stub_server):
+    llm = get_llm("stub-model", base_url=stub_server.url)
+    cache = SQLiteResponseCache(tmp_path / "responses.sqlite")
+    stats = {}
+
+    text = stream_text(llm, "Summarize the cohort.", cache=cache, stats=stats)
+    assert not stats["cached"] and cache.count == 1
+
+    assert stream_text(llm, "Summarize the cohort.", cache=cache, stats=stats) == text
+    assert stats["cached"]
+    requests = stub_server.settings.requests
+
+    key = cache.key("Summarize the cohort.", llm_client.generation_options(llm))
+    cache.put(key, "stale answer")
+    assert stream_text(llm, "Summarize the cohort.", cache=cache, stats=stats, bypass=True) == text
+    assert not stats["cached"]
+    assert stub_server.settings.requests == requests + 1
+    assert cache.get(key) == text
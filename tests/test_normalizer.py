@@ -0,0 +1,55 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from benchmark import legacy_clean_text
+from normalizer import normalize_text
+
+EDGE_CASES = [
+    "", " ", "\n\n", "abc", "camelCaseWord", "aBcDeF", "HTMLParser", "iPhoneX",
+    "tab\tsep\nnew line\r\n", "non\u00a0breaking\u2003space", "na\u00efve caf\u00e9",
+    # ligatures and zero-width characters (common in PDF text layers)
+    "\ufb01rst ligature", "o\ufb00-label e\ufb03cacy", "zero\u200bwidth\u200cjoin\u200dner",
+    "\ufeffbom", "camel\u200bCase", "camel\u200bcase",
+    "x_y/z*w", "(a)-[b]", "trailing   ", "   leading", "ICD-10: F51.0;",
+    "semantically richmedicalinformation", "Di SMOL (18.9%)", "\u3000ideographic\u3000",
+]
+FUZZ_ALPHABET = "aAzZbBmM09 .,;:()-\n\t\r\x0b\x0c\u00a0\u2009\u200b\u3000\u00e9\u2122\u00df\ufb01\x1c_/*[]'\"%"
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_edge_cases_match_legacy(text):
+    assert normalize_text(text) == legacy_clean_text(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", ""),
+    (None, ""),
+    ("camelCaseWord", "camel Case Word"),
+    ("HTMLParser", "HTMLParser"),
+    ("zero\u200bwidth", "zero width"),
+    ("\ufb01rst", "rst"),
+    ("a\n\tb  c", "a b c"),
+])
+def test_expected_output(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_seeded_fuzz_matches_legacy():
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = "".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 40)))
+        assert normalize_text(text) == legacy_clean_text(text), repr(text)
+
+
+def test_real_pages_match_legacy():
+    pdfplumber = pytest.importorskip("pdfplumber")
+    docs = Path(__file__).resolve().parent.parent / "docs"
+    pdf_paths = sorted(docs.glob("*/*.pdf"))
+    if not pdf_paths:
+        pytest.skip("no PDFs under docs/")
+    with pdfplumber.open(pdf_paths[0]) as pdf:
+        for page in pdf.pages[:10]:
+            text = page.extract_text() or ""
+            assert normalize_text(text) == legacy_clean_text(text)
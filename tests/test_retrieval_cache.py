@@ -0,0 +1,92 @@
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore
+
+from cache_utils import LRUCache
+from retrieval_cache import CachedRetriever, RetrievalCache
+
+
+class CountingRetriever(BaseRetriever):
+    """Returns fixed hits and records each query it actually ran"""
+
+    def __init__(self, nodes):
+        super().__init__()
+        self.hits = [NodeWithScore(node=node, score=1.0) for node in nodes]
+        self.queries = []
+
+    def _retrieve(self, query_bundle):
+        self.queries.append(query_bundle.query_str)
+        return list(self.hits)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75, "entries": 2}
+
+
+def test_retrieval_cache_returns_copies(make_nodes):
+    cache = RetrievalCache(4)
+    hits = [NodeWithScore(node=node, score=0.5) for node in make_nodes(2)]
+    cache.put(("v1", (), "q", 2), hits)
+    hits.clear()
+
+    first = cache.get(("v1", (), "q", 2))
+    first.pop()
+
+    assert len(cache.get(("v1", (), "q", 2))) == 2
+
+
+def test_check_version_drops_only_stale_entries_of_that_scope():
+    cache = RetrievalCache(8)
+    cache.check_version("dense", "v1")
+    cache.check_version("bm25", "v1")
+    cache.put(("v1", "dense", "q", 2), [])
+    cache.put(("v1", "bm25", "q", 2), [])
+
+    cache.check_version("dense", "v2")
+
+    assert cache.get(("v1", "dense", "q", 2)) is None
+    assert cache.get(("v1", "bm25", "q", 2)) == []
+
+
+def test_cached_retriever_requeries_after_version_change(make_nodes):
+    retriever = CountingRetriever(make_nodes(2))
+    version = ["v1"]
+    cached = CachedRetriever(retriever, RetrievalCache(8), lambda: version[0], scope="dense")
+
+    cached.retrieve("Adverse  Events")
+    cached.retrieve("adverse events")
+    assert retriever.queries == ["Adverse  Events"]
+
+    version[0] = "v2"
+    hits = cached.retrieve("adverse events")
+    assert retriever.queries == ["Adverse  Events", "adverse events"]
+    assert [hit.node.node_id for hit in hits] == ["n0", "n1"]
+    assert cached.cache.stats()["entries"] == 1
+
+
+def test_cached_retriever_batch_runs_only_misses(make_nodes):
+    retriever = CountingRetriever(make_nodes(1))
+    cached = CachedRetriever(retriever, RetrievalCache(8), lambda: "v1")
+    cached.retrieve("first")
+
+    results = cached.retrieve_batch(["first", "second", "First"])
+
+    assert retriever.queries == ["first", "second"]
+    assert len(results) == 3 and all(len(hits) == 1 for hits in results)
+
+
+def test_cached_retriever_without_version_never_caches(make_nodes):
+    retriever = CountingRetriever(make_nodes(1))
+    cached = CachedRetriever(retriever, RetrievalCache(8), lambda: None)
+
+    cached.retrieve("q")
+    cached.retrieve("q")
+
+    assert retriever.queries == ["q", "q"]
@@ -0,0 +1,112 @@
+import random
+from collections import Counter
+
+import pytest
+
+from terms import AhoCorasick, PhraseFilter, SpaceSaving, iter_candidates
+
+BAD_TERMS = ["learning", "notes", "risk management", "abc"]
+SKIP_WORDS = ["the", "cohort", "plan"]
+WORDS = ("the of cohort cohorts plan planning learning notes risk management signal "
+         "detection brrr xyz abc abcd insomnia pharmacovigilance").split()
+
+
+def naive_accepts(phrase, bad_terms, skip_words, min_phrase_length, require_vowels):
+    """PhraseFilter rules the slow way: one substring search per term"""
+    if len(phrase) < min_phrase_length:
+        return False
+    if any(term in phrase for term in bad_terms):
+        return False
+    for word in skip_words:
+        start = phrase.find(word)
+        while start != -1:
+            end = start + len(word)
+            if (start == 0 or not phrase[start - 1].isalnum()) and \
+                    (end == len(phrase) or not phrase[end].isalnum()):
+                return False
+            start = phrase.find(word, start + 1)
+    if require_vowels:
+        runs = "".join(ch if ch.isalpha() else " " for ch in phrase).split()
+        if any(not set(run) & PhraseFilter.VOWELS for run in runs):
+            return False
+    return True
+
+
+def random_phrases(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(1, 4))]
+        yield rng.choice([" ", "-", "  ", "/"]).join(words)
+
+
+def test_aho_corasick_finds_every_occurrence():
+    patterns = ["he", "she", "his", "hers", "s"]
+    text = "ushers and his sheep"
+    automaton = AhoCorasick((pattern, pattern) for pattern in patterns)
+
+    found = sorted((end - length + 1, payload) for end, length, payload in automaton.iter_matches(text))
+
+    expected = sorted((i, p) for p in patterns for i in range(len(text)) if text.startswith(p, i))
+    assert found == expected
+
+
+@pytest.mark.parametrize("require_vowels", [False, True])
+@pytest.mark.parametrize("min_phrase_length", [0, 12])
+def test_phrase_filter_matches_naive_rules(require_vowels, min_phrase_length):
+    phrase_filter = PhraseFilter(BAD_TERMS, SKIP_WORDS, min_phrase_length, require_vowels)
+    for phrase in random_phrases(3000):
+        expected = naive_accepts(phrase, BAD_TERMS, SKIP_WORDS, min_phrase_length, require_vowels)
+        assert phrase_filter.check(phrase) == expected, phrase
+        assert phrase_filter.accepts(phrase) == expected, phrase  # memoized path agrees
+
+
+def test_memo_is_bounded_and_optional():
+    phrase_filter = PhraseFilter(BAD_TERMS, SKIP_WORDS, memo_entries=50)
+    for phrase in random_phrases(1000):
+        phrase_filter.accepts(phrase)
+    assert phrase_filter._verdicts.stats()["entries"] <= 50
+
+    unmemoized = PhraseFilter(BAD_TERMS, SKIP_WORDS, memo_entries=0)
+    for phrase in random_phrases(100):
+        unmemoized.accepts(phrase)
+    assert unmemoized._verdicts.stats()["entries"] == 0
+
+
+def zipf_stream(count, seed=0):
+    rng = random.Random(seed)
+    return [f"term{int(rng.paretovariate(0.5) * 3)}" for _ in range(count)]
+
+
+@pytest.mark.parametrize("capacity", [5, 20, 100])
+def test_space_saving_error_bounds(capacity):
+    stream = zipf_stream(20000)
+    exact = Counter(stream)
+    sketch = SpaceSaving(capacity).update(stream)
+
+    assert sketch.total == len(stream)
+    assert len(sketch.counts) <= capacity
+    for item, count, error in sketch.top(capacity):
+        assert count - error <= exact[item] <= count
+        assert error <= sketch.error_bound
+    # Anything more frequent than N/m is guaranteed to be tracked
+    assert {item for item, n in exact.items() if n > sketch.error_bound} <= set(sketch.counts)
+
+
+def test_space_saving_is_exact_within_capacity():
+    stream = zipf_stream(5000)
+    exact = Counter(stream)
+    sketch = SpaceSaving(len(exact)).update(stream)
+
+    assert {item: count for item, count, _ in sketch.top(len(exact))} == exact
+    assert all(error == 0 for _, _, error in sketch.top(len(exact)))
+
+
+def test_streaming_candidates_skip_the_memo():
+    phrase_filter = PhraseFilter(min_phrase_length=5)
+    pages = ["Signal Detection in Pharmacovigilance. Insomnia Cohort"] * 3
+
+    assert list(iter_candidates(pages, phrase_filter, memo=False)) == \
+        list(iter_candidates(pages, phrase_filter))
+    fresh = PhraseFilter(min_phrase_length=5)
+    list(iter_candidates(pages, fresh, memo=False))
+    assert fresh._verdicts.stats()["entries"] == 0
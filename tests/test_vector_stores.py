@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from vector_stores import FaissVectorStore, NumpyVectorStore, source_filters
+
+ROWS = 39 * 16  # enough to train a 4-bit product quantizer
+
+
+@pytest.mark.parametrize("store", [
+    NumpyVectorStore(),
+    NumpyVectorStore(quantization="float16"),
+    NumpyVectorStore(quantization="int8"),
+    NumpyVectorStore(quantization="pq", pq_m=4, pq_bits=4),
+    FaissVectorStore(),
+], ids=["none", "float16", "int8", "pq", "faiss"])
+def test_filter_matching_no_rows_returns_no_hits(store, make_nodes):
+    nodes = make_nodes(ROWS)
+    store.add(nodes)
+    query = VectorStoreQuery(query_embedding=nodes[0].embedding, similarity_top_k=3,
+                             filters=source_filters(["missing.pdf"]))
+
+    result = store.query(query)
+
+    assert result.ids == []
+    assert result.similarities == []
+
+
+def test_pq_store_trains_codes_and_filters(make_nodes):
+    store = NumpyVectorStore(quantization="pq", pq_m=4, pq_bits=4)
+    nodes = make_nodes(ROWS)
+    store.add(nodes)
+    query = VectorStoreQuery(query_embedding=nodes[5].embedding, similarity_top_k=3,
+                             filters=source_filters(["publication.pdf"], pages=[6]))
+
+    result = store.query(query)
+
+    assert not isinstance(store._codes, np.ndarray)  # a faiss IndexPQ, not the int8 fallback
+    assert result.ids[0] == "n5"
+    assert all(int(node_id[1:]) % 7 == 5 for node_id in result.ids)
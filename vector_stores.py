@@ -0,0 +1,629 @@
+"""Vector stores behind the RAG index, selected by ``vector_store`` in config.yaml.
+
+``simple`` is llama_index's default SimpleVectorStore (Python lists, scored
+in a Python loop). ``numpy`` keeps every embedding as a row of one
+contiguous, L2-normalised float32 matrix, so a query is a single
+matrix-vector product plus ``np.argpartition`` and a batch of queries is one
+matrix-matrix product; it can also scan float16 / int8 / PQ codes and
+rescore a shortlist in float32. ``faiss`` hands the same normalised rows to a FAISS
+Flat, IVF-Flat or HNSW index (inner product = cosine) for sub-linear search
+on large corpora; the index file is memory-mapped on load. ``qdrant`` is
+Qdrant's embedded local-path mode (no server): points are upserted by chunk
+id and carry the chunk metadata (source file, page) as filterable payload.
+"""
+import math
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.indices.vector_store.retrievers import VectorIndexRetriever
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import build_metadata_filter_fn, node_to_metadata_dict
+
+from cache_utils import read_json, write_json_atomic
+
+# StorageContext.persist names the default store "<namespace>__vector_store.json"
+PERSIST_FNAME = "default__vector_store.json"
+
+# Options that only affect how a stored index is searched/opened, so
+# changing them must not trigger a rebuild
+QUERY_TIME_OPTIONS = {"nprobe", "ef_search", "mmap", "batch_size", "rescore"}
+
+# Rows dequantized at a time when scanning float16/int8 codes
+SCAN_BLOCK_ROWS = 65536
+
+# Embedded Qdrant locks its folder, so one client per path and process
+_qdrant_clients = {}
+_qdrant_lock = threading.Lock()
+
+
+def normalize_rows(vectors):
+    """float32 copy with unit-length rows (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_rows(scores, k):
+    """Indices of the ``k`` highest scores per row, best first"""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < scores.shape[-1]:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(k), scores.shape[:-1] + (k,))
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+class RowVectorStore(BasePydanticVectorStore):
+    """Bookkeeping shared by the stores that keep vectors as numbered rows.
+
+    Row ``i`` holds node ``_ids[i]``. Deletions only mark rows dead; rows are
+    compacted once the dead make up half of them (and on persist).
+    Subclasses store the vectors and implement ``_add_vectors``,
+    ``_keep_vectors``, ``_search``, ``_save_vectors`` and ``_load_vectors``.
+    """
+
+    stores_text: bool = False
+
+    _alive = PrivateAttr(default=None)      # (capacity,) bool; rows [:size] in use
+    _size = PrivateAttr(default=0)
+    _dead = PrivateAttr(default=0)
+    _ids = PrivateAttr(default_factory=list)
+    _ref_doc_ids = PrivateAttr(default_factory=list)
+    _metadata = PrivateAttr(default_factory=list)
+    _row_of = PrivateAttr(default_factory=dict)
+    _rows_by_ref = PrivateAttr(default_factory=dict)
+
+    @property
+    def client(self):
+        return None
+
+    @property
+    def count(self):
+        """Live rows (not ``__len__``: StorageContext treats empty stores as unset)"""
+        return self._size - self._dead
+
+    def _track(self, ids, ref_doc_ids, metadata):
+        """Register rows appended after the current ones"""
+        start, stop = self._size, self._size + len(ids)
+        if self._alive is None or stop > len(self._alive):
+            alive = np.zeros(max(stop, 1024, 2 * self._size), dtype=bool)
+            if self._alive is not None:
+                alive[:self._size] = self._alive[:self._size]
+            self._alive = alive
+        self._alive[start:stop] = True
+        for row, (node_id, ref_doc_id) in enumerate(zip(ids, ref_doc_ids), start):
+            self._row_of[node_id] = row
+            self._rows_by_ref.setdefault(ref_doc_id, []).append(row)
+        self._ids += ids
+        self._ref_doc_ids += ref_doc_ids
+        self._metadata += metadata
+        self._size = stop
+
+    def add_embeddings(self, ids, embeddings, ref_doc_ids=None, metadata=None):
+        """Append raw vectors without building nodes (bulk loads, benchmarks)"""
+        ids = list(ids)
+        self._add_vectors(normalize_rows(embeddings))
+        self._track(ids, list(ref_doc_ids) if ref_doc_ids is not None else ["None"] * len(ids),
+                    list(metadata) if metadata is not None else [{} for _ in ids])
+
+    def add(self, nodes, **add_kwargs):
+        if not nodes:
+            return []
+        ids = [node.node_id for node in nodes]
+        self._kill_rows([self._row_of[node_id] for node_id in ids if node_id in self._row_of])
+        metadata = []
+        for node in nodes:
+            node_metadata = node_to_metadata_dict(node, remove_text=True, flat_metadata=False)
+            node_metadata.pop("_node_content", None)
+            metadata.append(node_metadata)
+        self.add_embeddings(ids, [node.get_embedding() for node in nodes],
+                            [node.ref_doc_id or "None" for node in nodes], metadata)
+        return ids
+
+    def _kill_rows(self, rows):
+        for row in rows:
+            if self._alive[row]:
+                self._alive[row] = False
+                self._row_of.pop(self._ids[row], None)
+                self._dead += 1
+        if self._dead and self._dead * 2 >= self._size:
+            self._compact()
+
+    def _compact(self):
+        if not self._dead:
+            return
+        keep = np.flatnonzero(self._alive[:self._size])
+        self._keep_vectors(keep)
+        ids, ref_doc_ids, metadata = self._ids, self._ref_doc_ids, self._metadata
+        self._alive, self._size, self._dead = None, 0, 0
+        self._ids, self._ref_doc_ids, self._metadata = [], [], []
+        self._row_of, self._rows_by_ref = {}, {}
+        self._track([ids[row] for row in keep], [ref_doc_ids[row] for row in keep],
+                    [metadata[row] for row in keep])
+
+    def delete(self, ref_doc_id, **delete_kwargs):
+        self._kill_rows(self._rows_by_ref.pop(ref_doc_id, []))
+
+    def delete_nodes(self, node_ids=None, filters=None, **delete_kwargs):
+        self._kill_rows(np.flatnonzero(self._row_mask(node_ids, filters)))
+
+    def clear(self):
+        self._keep_vectors(np.zeros(0, dtype=np.int64))
+        self._alive, self._size, self._dead = None, 0, 0
+        self._ids, self._ref_doc_ids, self._metadata = [], [], []
+        self._row_of, self._rows_by_ref = {}, {}
+
+    def _row_mask(self, node_ids=None, filters=None):
+        """Live rows, optionally restricted to ``node_ids`` / metadata ``filters``"""
+        if self._size == 0:
+            return np.zeros(0, dtype=bool)
+        mask = self._alive[:self._size].copy()
+        if node_ids is not None:
+            allowed = np.zeros(self._size, dtype=bool)
+            allowed[[self._row_of[i] for i in node_ids if i in self._row_of]] = True
+            mask &= allowed
+        if filters is not None and filters.filters:
+            filter_fn = build_metadata_filter_fn(lambda row: self._metadata[row], filters)
+            for row in np.flatnonzero(mask):
+                mask[row] = filter_fn(row)
+        return mask
+
+    def query(self, query, **kwargs):
+        return self.query_batch([query.query_embedding], query.similarity_top_k,
+                                node_ids=query.node_ids, filters=query.filters,
+                                mode=query.mode)[0]
+
+    def query_batch(self, query_embeddings, top_k, node_ids=None, filters=None,
+                    mode=VectorStoreQueryMode.DEFAULT):
+        """One VectorStoreQueryResult per query embedding, searched together"""
+        if mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"Invalid query mode: {mode}")
+        queries = normalize_rows(query_embeddings)
+        if self.count == 0:
+            return [VectorStoreQueryResult(similarities=[], ids=[]) for _ in queries]
+
+        mask = None
+        if self._dead or node_ids is not None or filters is not None:
+            mask = self._row_mask(node_ids, filters)
+            top_k = min(top_k, int(mask.sum()))
+        if top_k <= 0:
+            return [VectorStoreQueryResult(similarities=[], ids=[]) for _ in queries]
+        return [
+            VectorStoreQueryResult(
+                similarities=[float(score) for score in scores],
+                ids=[self._ids[row] for row in rows],
+            )
+            for scores, rows in self._search(queries, top_k, mask)
+        ]
+
+    def persist(self, persist_path, fs=None):
+        self._compact()
+        persist_path = Path(persist_path)
+        persist_path.parent.mkdir(parents=True, exist_ok=True)
+        self._save_vectors(persist_path)
+        write_json_atomic(persist_path, {
+            "store": self.class_name(),
+            "ids": self._ids,
+            "ref_doc_ids": self._ref_doc_ids,
+            "metadata": self._metadata,
+        })
+
+    @classmethod
+    def from_persist_path(cls, persist_path, fs=None, **options):
+        data = read_json(persist_path)
+        if not data or data.get("store") != cls.class_name():
+            raise ValueError(f"No {cls.class_name()} at {persist_path}")
+        store = cls(**options)
+        store._load_vectors(Path(persist_path))
+        store._track(data["ids"], data["ref_doc_ids"], data["metadata"])
+        return store
+
+
+class NumpyVectorStore(RowVectorStore):
+    """Cosine top-k over one contiguous float32 matrix (saved as ``.npy``).
+
+    With ``quantization`` (``float16``, ``int8`` or ``pq``) queries first
+    scan compact codes, then rescore a shortlist of ``rescore * top_k`` rows
+    against the exact float32 rows. After a reload those float32 rows are
+    memory-mapped (``mmap``), so only the codes stay resident. ``int8`` is
+    per-dimension scalar quantization; ``pq`` is a FAISS product quantizer
+    with ``pq_m`` sub-vectors of ``pq_bits`` bits (int8 is used until there
+    are enough rows to train it). Codes are rebuilt lazily after changes.
+    """
+
+    quantization: str = "none"
+    rescore: int = 4
+    pq_m: int = 48
+    pq_bits: int = 8
+    mmap: bool = True
+
+    _matrix = PrivateAttr(default=None)     # (capacity, dim); rows [:size] in use
+    _codes = PrivateAttr(default=None)      # float16/int8 rows, or a faiss IndexPQ
+    _scale = PrivateAttr(default=None)      # int8: per-dimension dequantization scale
+
+    @classmethod
+    def class_name(cls):
+        return "NumpyVectorStore"
+
+    @property
+    def nbytes(self):
+        """Resident bytes: float32 rows unless memory-mapped, plus any codes"""
+        if self._matrix is None:
+            return 0
+        resident = 0 if isinstance(self._matrix, np.memmap) else self._size * self._matrix.shape[1] * 4
+        if isinstance(self._codes, np.ndarray):
+            resident += self._codes.nbytes
+        elif self._codes is not None:
+            resident += self._codes.ntotal * self._codes.code_size
+        return resident
+
+    def _writable_matrix(self):
+        if isinstance(self._matrix, np.memmap):
+            self._matrix = np.array(self._matrix[:self._size])
+        self._codes = self._scale = None
+
+    def _add_vectors(self, vectors):
+        self._writable_matrix()
+        needed = self._size + len(vectors)
+        if self._matrix is None or needed > len(self._matrix):
+            matrix = np.empty((max(needed, 1024, 2 * self._size), vectors.shape[1]), dtype=np.float32)
+            if self._matrix is not None:
+                matrix[:self._size] = self._matrix[:self._size]
+            self._matrix = matrix
+        self._matrix[self._size:needed] = vectors
+
+    def _keep_vectors(self, keep):
+        self._writable_matrix()
+        if self._matrix is not None:
+            self._matrix[:len(keep)] = self._matrix[keep]
+
+    def _encode(self):
+        """Build the codes for rows [:size] if they are missing"""
+        if self._codes is not None or self.quantization == "none":
+            return
+        rows = self._matrix[:self._size]
+        if self.quantization == "float16":
+            self._codes = rows.astype(np.float16)
+        elif self.quantization == "pq" and self._size >= 39 * (1 << self.pq_bits):
+            import faiss
+
+            index = faiss.IndexPQ(rows.shape[1], self.pq_m, self.pq_bits, faiss.METRIC_INNER_PRODUCT)
+            index.train(np.ascontiguousarray(rows))
+            index.add(np.ascontiguousarray(rows))
+            self._codes = index
+        elif self.quantization in ("int8", "pq"):
+            self._scale = np.maximum(np.abs(rows).max(axis=0), 1e-12) / 127
+            self._codes = np.rint(rows / self._scale).astype(np.int8)
+        else:
+            raise ValueError(f"Unknown quantization {self.quantization!r}; expected none, float16, int8 or pq")
+
+    def _approx_scores(self, queries):
+        """Scores from the float16/int8 codes, dequantized a block at a time"""
+        if self._scale is not None:
+            queries = queries * self._scale
+        scores = np.empty((len(queries), self._size), dtype=np.float32)
+        for start in range(0, self._size, SCAN_BLOCK_ROWS):
+            block = self._codes[start:start + SCAN_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores
+
+    def _shortlist(self, queries, size, mask):
+        """(rows, valid) of the ``size`` best rows per query by the codes"""
+        if not isinstance(self._codes, np.ndarray):
+            if mask is None:
+                _, rows = self._codes.search(queries, size)
+                return np.maximum(rows, 0), rows >= 0
+            # IndexPQ takes no ID selector: score the allowed rows from their
+            # decoded codes (same inner products as the PQ search)
+            allowed = np.flatnonzero(mask)
+            scores = np.empty((len(queries), len(allowed)), dtype=np.float32)
+            for start in range(0, len(allowed), SCAN_BLOCK_ROWS):
+                block = allowed[start:start + SCAN_BLOCK_ROWS]
+                scores[:, start:start + len(block)] = queries @ self._codes.reconstruct_batch(block).T
+            rows = top_k_rows(scores, size)
+            return allowed[rows], np.ones(rows.shape, dtype=bool)
+        scores = self._approx_scores(queries)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        rows = top_k_rows(scores, size)
+        return rows, np.isfinite(np.take_along_axis(scores, rows, axis=-1))
+
+    def _search(self, queries, top_k, mask):
+        if self.quantization == "none":
+            scores = queries @ self._matrix[:self._size].T
+            if mask is not None:
+                scores[:, ~mask] = -np.inf
+            rows = top_k_rows(scores, top_k)
+            return zip(np.take_along_axis(scores, rows, axis=-1), rows)
+
+        self._encode()
+        rows, valid = self._shortlist(queries, min(self._size, top_k * max(self.rescore, 1)), mask)
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        exact_rows = self._matrix[unique_rows][inverse.reshape(rows.shape)]
+        exact = np.einsum("qd,qkd->qk", queries, exact_rows)
+        exact[~valid] = -np.inf
+        order = top_k_rows(exact, top_k)
+        return zip(np.take_along_axis(exact, order, axis=-1), np.take_along_axis(rows, order, axis=-1))
+
+    def _save_vectors(self, persist_path):
+        matrix_path = persist_path.with_suffix(".npy")
+        if not isinstance(self._matrix, np.memmap):  # a mapped matrix is unchanged since load
+            tmp_path = matrix_path.with_suffix(".tmp.npy")
+            np.save(tmp_path, self._matrix[:self._size] if self._matrix is not None
+                    else np.zeros((0, 0), np.float32))
+            os.replace(tmp_path, matrix_path)
+        if self.quantization != "none" and self._matrix is not None:
+            self._encode()
+            codes_path = persist_path.with_suffix(".codes")
+            tmp_path = codes_path.with_suffix(".tmp")
+            if isinstance(self._codes, np.ndarray):
+                with open(tmp_path, "wb") as f:
+                    np.save(f, self._codes)
+                    np.save(f, self._scale if self._scale is not None else np.zeros(0, np.float32))
+            else:
+                import faiss
+
+                faiss.write_index(self._codes, str(tmp_path))
+            os.replace(tmp_path, codes_path)
+
+    def _load_vectors(self, persist_path):
+        quantized = self.quantization != "none"
+        matrix = np.load(persist_path.with_suffix(".npy"), mmap_mode="r" if quantized and self.mmap else None)
+        self._matrix = matrix if len(matrix) else None
+        codes_path = persist_path.with_suffix(".codes")
+        if quantized and self._matrix is not None and codes_path.exists():
+            if self.quantization == "pq" and len(matrix) >= 39 * (1 << self.pq_bits):
+                import faiss
+
+                self._codes = faiss.read_index(str(codes_path))
+            else:
+                with open(codes_path, "rb") as f:
+                    codes, scale = np.load(f), np.load(f)
+                if codes.dtype == (np.float16 if self.quantization == "float16" else np.int8):
+                    self._codes, self._scale = codes, (scale if len(scale) else None)
+
+
+class FaissVectorStore(RowVectorStore):
+    """Cosine top-k through a FAISS index over normalised rows.
+
+    ``index_type`` is ``flat`` (exact), ``ivf`` (IVF-Flat; ``nlist`` cells,
+    0 = 4*sqrt(rows) capped at rows/39, ``nprobe`` searched per query) or ``hnsw`` (``hnsw_m``
+    links, ``ef_construction`` / ``ef_search`` beam widths). New vectors are
+    buffered and added (IVF: trained on) at the first query or persist, so
+    a full build trains on the whole corpus. With ``mmap`` the persisted
+    ``.faiss`` file is memory-mapped and only read into RAM on the first
+    change.
+    """
+
+    index_type: str = "hnsw"
+    nlist: int = 0
+    nprobe: int = 16
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    mmap: bool = True
+
+    _index = PrivateAttr(default=None)
+    _pending = PrivateAttr(default_factory=list)
+    _mmap_path = PrivateAttr(default=None)
+
+    @classmethod
+    def class_name(cls):
+        return "FaissVectorStore"
+
+    def _new_index(self, vectors):
+        import faiss
+
+        dim = vectors.shape[1]
+        if self.index_type == "flat":
+            return faiss.IndexFlatIP(dim)
+        if self.index_type == "ivf":
+            # FAISS wants >= 39 training points per cell
+            nlist = max(1, min(self.nlist or int(4 * math.sqrt(len(vectors))), len(vectors) // 39))
+            index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            return index
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.ef_construction
+            return index
+        raise ValueError(f"Unknown FAISS index_type {self.index_type!r}; expected flat, ivf or hnsw")
+
+    def _materialize(self):
+        """Swap a memory-mapped (read-only) index for an in-RAM copy"""
+        if self._mmap_path is not None:
+            import faiss
+
+            self._index = faiss.read_index(self._mmap_path)
+            self._mmap_path = None
+
+    def _flush(self):
+        if not self._pending:
+            return
+        vectors = np.concatenate(self._pending)
+        self._pending = []
+        self._materialize()
+        if self._index is None:
+            self._index = self._new_index(vectors)
+        self._index.add(vectors)
+
+    def _vectors(self):
+        self._flush()
+        self._materialize()
+        if self._index is None or self._index.ntotal == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+        if self.index_type == "ivf":
+            import faiss
+
+            faiss.extract_index_ivf(self._index).make_direct_map()
+        return self._index.reconstruct_n(0, self._index.ntotal)
+
+    def _add_vectors(self, vectors):
+        self._pending.append(vectors)
+
+    def _keep_vectors(self, keep):
+        vectors = self._vectors()[keep] if len(keep) else None
+        self._index, self._pending, self._mmap_path = None, [], None
+        if vectors is not None:
+            self._add_vectors(vectors)
+
+    def _search_params(self, top_k, selector):
+        import faiss
+
+        if self.index_type == "ivf":
+            return faiss.SearchParametersIVF(nprobe=self.nprobe, sel=selector)
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(efSearch=max(self.ef_search, top_k), sel=selector)
+        return faiss.SearchParameters(sel=selector) if selector is not None else None
+
+    def _search(self, queries, top_k, mask):
+        import faiss
+
+        self._flush()
+        if top_k <= 0:
+            return [([], []) for _ in queries]
+        selector, bitmap = None, None
+        if mask is not None:
+            # Keep the bitmap referenced for as long as FAISS reads it
+            bitmap = np.packbits(mask, bitorder="little")
+            selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        scores, rows = self._index.search(queries, top_k, params=self._search_params(top_k, selector))
+        return [(query_scores[query_rows >= 0], query_rows[query_rows >= 0])
+                for query_scores, query_rows in zip(scores, rows)]
+
+    def _save_vectors(self, persist_path):
+        import faiss
+
+        self._flush()
+        index_path = persist_path.with_suffix(".faiss")
+        if self._index is None:
+            index_path.unlink(missing_ok=True)
+        elif self._mmap_path is None:  # a mapped index is unchanged since load
+            tmp_path = index_path.with_suffix(".tmp.faiss")
+            faiss.write_index(self._index, str(tmp_path))
+            os.replace(tmp_path, index_path)
+
+    def _load_vectors(self, persist_path):
+        import faiss
+
+        index_path = persist_path.with_suffix(".faiss")
+        if not index_path.exists():
+            return
+        if self.mmap:
+            self._index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP)
+            self._mmap_path = str(index_path)
+        else:
+            self._index = faiss.read_index(str(index_path))
+
+
+VECTOR_STORES = {"numpy": NumpyVectorStore, "faiss": FaissVectorStore}
+BACKENDS = ("simple", *VECTOR_STORES, "qdrant")
+
+
+def get_qdrant_client(path):
+    """Shared embedded (local-path) QdrantClient for ``path``"""
+    from qdrant_client import QdrantClient
+
+    path = str(Path(path).resolve())
+    with _qdrant_lock:
+        if path not in _qdrant_clients:
+            Path(path).mkdir(parents=True, exist_ok=True)
+            _qdrant_clients[path] = QdrantClient(path=path)
+        return _qdrant_clients[path]
+
+
+def open_qdrant_store(persist_dir, fresh=False, collection="rag_chunks", batch_size=64):
+    """QdrantVectorStore on ``persist_dir/qdrant``; ``fresh`` drops the collection"""
+    from llama_index.vector_stores.qdrant import QdrantVectorStore
+
+    client = get_qdrant_client(Path(persist_dir) / "qdrant")
+    if fresh:
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+    elif not client.collection_exists(collection):
+        raise ValueError(f"No Qdrant collection {collection!r} in {persist_dir}")
+    # Local mode filters payload without (and ignores) payload indexes
+    return QdrantVectorStore(collection_name=collection, client=client, batch_size=batch_size,
+                             index_doc_id=False)
+
+
+def source_filters(file_names=None, pages=None):
+    """Metadata/payload filter on source PDF names and page labels (None = all)"""
+    filters = []
+    if file_names:
+        filters.append(MetadataFilter(key="file_name", value=list(file_names), operator=FilterOperator.IN))
+    if pages:
+        filters.append(MetadataFilter(key="page_label", value=[str(p) for p in pages],
+                                      operator=FilterOperator.IN))
+    return MetadataFilters(filters=filters) if filters else None
+
+
+def index_signature(kind, options=None):
+    """The parts of a vector store config that shape what is stored"""
+    build_options = {k: v for k, v in (options or {}).items() if k not in QUERY_TIME_OPTIONS}
+    return {"kind": kind or "simple", **build_options}
+
+
+def open_vector_store(kind, persist_dir, fresh=False, **options):
+    """Store for ``kind`` (None = llama_index's SimpleVectorStore default).
+
+    The store is loaded from ``persist_dir`` (what ``StorageContext.persist``
+    wrote there, or the embedded Qdrant folder); with ``fresh`` a new, empty
+    store is returned instead. ``options`` are the store's settings (e.g. the
+    FAISS index type and search parameters).
+    """
+    if kind in (None, "simple"):
+        return None
+    if kind == "qdrant":
+        return open_qdrant_store(persist_dir, fresh, **options)
+    if kind not in VECTOR_STORES:
+        raise ValueError(f"Unknown vector_store {kind!r}; expected one of {', '.join(BACKENDS)}")
+    store_cls = VECTOR_STORES[kind]
+    if fresh:
+        return store_cls(**options)
+    return store_cls.from_persist_path(str(Path(persist_dir) / PERSIST_FNAME), **options)
+
+
+def retrieve_batch(retriever, query_bundles):
+    """``retriever.retrieve`` for many queries, as one search where possible.
+
+    Retrievers with their own ``retrieve_batch`` handle the batch; an index
+    retriever over a Numpy/FAISS store whose queries are already embedded
+    searches them all with one ``query_batch`` call. Anything else falls
+    back to one ``retrieve`` per query.
+    """
+    if hasattr(retriever, "retrieve_batch"):
+        return retriever.retrieve_batch(query_bundles)
+    store = getattr(retriever, "_vector_store", None)
+    if not query_bundles or not isinstance(retriever, VectorIndexRetriever) \
+            or not isinstance(store, RowVectorStore) \
+            or any(bundle.embedding is None for bundle in query_bundles):
+        return [retriever.retrieve(bundle) for bundle in query_bundles]
+
+    query = retriever._build_vector_store_query(query_bundles[0])
+    results = store.query_batch([bundle.embedding for bundle in query_bundles], query.similarity_top_k,
+                                node_ids=query.node_ids, filters=query.filters, mode=query.mode)
+    hits = []
+    for result in results:
+        # Same docstore lookup as VectorIndexRetriever._get_nodes_with_embeddings
+        nodes_to_fetch = retriever._determine_nodes_to_fetch(result)
+        if nodes_to_fetch:
+            result.nodes = retriever._insert_fetched_nodes_into_query_result(
+                result, retriever._docstore.get_nodes(node_ids=nodes_to_fetch, raise_error=False)
+            )
+        hits.append(retriever._convert_nodes_to_scored_nodes(result))
+    return hits
@@ -1,5 +1,7 @@
 import streamlit as st
 from paper_generator import PaperGenerator
+from embeddings import embedding_stats
+from llm_client import stream_completion, llm_stats, llm_clients, format_call
 import os
 from pathlib import Path
 from datetime import datetime
@@ -8,6 +10,25 @@ from datetime import datetime
 st.set_page_config(layout="wide", page_title="🧪 PV Paper Assistant 3.0")
 generator = PaperGenerator("config.yaml")
 
+
+@st.cache_resource
+def start_corpus_watcher():
+    """One watcher per server process, kept across Streamlit reruns"""
+    return PaperGenerator("config.yaml").start_watcher()
+
+
+if generator.config.get("watch_corpus"):
+    start_corpus_watcher()
+
+with st.sidebar.expander("⚙️ Runtime stats"):
+    response_cache = generator.response_cache()
+    st.json({
+        "embedding_models": embedding_stats(),
+        "llm": llm_stats(),
+        "llm_clients": llm_clients(),
+        "llm_cache": response_cache.stats() if response_cache else None,
+    })
+
 # CSS
 if os.path.exists("style.css"):
     with open("style.css") as f:
@@ -62,11 +83,10 @@ with col_left:
     # ANSWER APPEARS BELOW BUTTON
     if st.session_state.get("show_review", False):
         with st.spinner("Generating paper review..."):
-            if "review_result" not in st.session_state:
+            if not st.session_state.get("review_result"):
                 try:
                     # GENERATE ACTUAL REVIEW
-                    data_paths = generator.load_data_pdfs()
-                    _, llm = generator.setup_rag(data_paths)
+                    llm = generator.get_llm()  # shared, pooled client (no index load)
                     
                     paper_path = (generator.get_base_path() / generator.config["output"]["output_dir"] / 
                                 f"{generator.config['output']['filename_prefix']}_{generator.config['title_suffix'].replace(' ', '_').lower()}.md")
@@ -86,7 +106,11 @@ with col_left:
                     Professional, concise format.
                     """
                     
-                    response = llm.complete(review_prompt).text.strip()
+                    # Tokens render as they arrive; kept for the rerun below
+                    response = st.write_stream(stream_completion(
+                        llm, review_prompt, "review", cache=generator.response_cache(),
+                        bypass=st.session_state.pop("review_bypass_cache", False),
+                    )).strip()
                     st.session_state.review_result = response
                     st.session_state.show_review = False
                     st.rerun()
@@ -105,6 +129,7 @@ with col_left:
         # NEW REVIEW BUTTON
         if st.button("🔄 **New Review**", type="secondary", use_container_width=True):
             st.session_state.review_result = None
+            st.session_state.review_bypass_cache = True  # fresh answer, not the cached one
             st.session_state.show_review = True
             st.rerun()
 
@@ -126,8 +151,7 @@ with col_left:
     if st.session_state.rag_messages and st.session_state.rag_messages[-1]["role"] == "user":
         with st.spinner("Searching paper + PDFs..."):
             question = st.session_state.rag_messages[-1]["content"]
-            data_paths = generator.load_data_pdfs()
-            _, llm = generator.setup_rag(data_paths)
+            llm = generator.get_llm()
             
             paper_path = (generator.get_base_path() / generator.config["output"]["output_dir"] / 
                          f"{generator.config['output']['filename_prefix']}_{generator.config['title_suffix'].replace(' ', '_').lower()}.md")
@@ -141,14 +165,21 @@ with col_left:
             QUESTION: {question}
             Answer ONLY from paper content above.
             """
-            response = llm.complete(rag_prompt).text.strip()
-            st.session_state.rag_messages.append({"role": "assistant", "content": response})
+            stats = {}
+            with st.chat_message("assistant"):
+                response = st.write_stream(stream_completion(
+                    llm, rag_prompt, "rag_chat", stats, cache=generator.response_cache())).strip()
+            st.session_state.rag_messages.append(
+                {"role": "assistant", "content": response, "stats": format_call(stats)}
+            )
             st.rerun()
     
     # Show RAG chat (last 2)
     for msg in st.session_state.get("rag_messages", [])[-2:]:
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
+            if msg.get("stats"):
+                st.caption(msg["stats"])
     
     st.divider()
     
@@ -168,7 +199,7 @@ with col_left:
     if st.session_state.general_messages and st.session_state.general_messages[-1]["role"] == "user":
         with st.spinner("Answering..."):
             question = st.session_state.general_messages[-1]["content"]
-            _, llm = generator.setup_rag([])  # No RAG
+            llm = generator.get_llm()  # No RAG
             
             prompt = f"""
             PHARMACOVIGILANCE EXPERT
@@ -178,14 +209,21 @@ with col_left:
             Answer concisely as Drug Safety journal reviewer.
             Use: GVP Modules, MedDRA v27.0, EMA guidelines.
             """
-            response = llm.complete(prompt).text.strip()
-            st.session_state.general_messages.append({"role": "assistant", "content": response})
+            stats = {}
+            with st.chat_message("assistant"):
+                response = st.write_stream(stream_completion(
+                    llm, prompt, "general_chat", stats, cache=generator.response_cache())).strip()
+            st.session_state.general_messages.append(
+                {"role": "assistant", "content": response, "stats": format_call(stats)}
+            )
             st.rerun()
     
     # Show general chat
     for msg in st.session_state.get("general_messages", [])[-2:]:
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
+            if msg.get("stats"):
+                st.caption(msg["stats"])
 
 
 # ========================================
@@ -223,8 +261,9 @@ with col_center:
             st.success("✅ Saved!")
             st.rerun()
     with col2:
+        bypass_cache = st.checkbox("Bypass LLM cache", help="Regenerate every section even if unchanged")
         if st.button("🔄 Generate"):
-            generator.generate_paper()
+            generator.generate_paper(bypass_cache=bypass_cache)
             st.rerun()
 
 # ========================================